@@ -1,108 +1,144 @@
-import openpyxl
+import argparse
+import logging
+import os
+import sys
+import time
 
-wb1 = openpyxl.load_workbook('apps.xlsx')
-#wb2 = openpyxl.load_workbook('awsdm.xlsx')
-
-ws1 = wb1.active
-#ws2 = wb2.active
-
-alert_announce_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/alert-announce/"
-alert_announce_module = "alert_announce"
-alert_announce_worksheet = wb1.create_sheet(title = alert_announce_module)
-
-awsdm_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/awsdm/1.0-r0/fulcrum/awsdm/"
-awsdm_module = "awsdm"
-awsdm_worksheet = wb1.create_sheet(title = awsdm_module)
-
-bbrpc_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/bbrpc/"
-bbrpc_module = "bbrpc"
-bbrpc_worksheet = wb1.create_sheet(title = bbrpc_module)
-
-fulcrum_voip_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/fulcrum-voip/"
-fulcrum_voip_module = "fulcrum_voip"
-fulcrum_voip_worksheet = wb1.create_sheet(title = fulcrum_voip_module)
-
-gui_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/oem-gui/"
-gui_module = "gui"
-gui_worksheet = wb1.create_sheet(title = gui_module)
-
-fota_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/fota/"
-fota_module = "fota"
-fota_worksheet = wb1.create_sheet(title = fota_module)
-
-get_hwid_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/get-hwid/"
-get_hwid_module = "get_hwid"
-get_hwid_worksheet = wb1.create_sheet(title = get_hwid_module)
-
-mediaserver_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/oem-mediaserver/"
-mediaserver_module = "mediaserver"
-mediaserver_worksheet = wb1.create_sheet(title = mediaserver_module)
-
-sscep_client_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/sscep-client/"
-sscep_client_module = "sscep_client"
-sscep_client_worksheet = wb1.create_sheet(title = sscep_client_module)
-
-diag_log_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/diag-log/"
-diag_log_module = "diag_log"
-diag_log_worksheet = wb1.create_sheet(title = diag_log_module)
-
-diagtool_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/diagtool/"
-diagtool_module = "diagtool"
-diagtool_worksheet = wb1.create_sheet(title = diagtool_module)
-
-diagnostic_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/diagnostic/"
-diagnostic_module = "diagnostic"
-diagnostic_worksheet = wb1.create_sheet(title = diagnostic_module)
-
-error_handle_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/err-handle/"
-error_handle_module = "error_handle"
-error_handle_worksheet = wb1.create_sheet(title = error_handle_module)
-
-batpersent_path = "poky/build/tmp-glibc/work/armv7a-vfp-neon-oe-linux-gnueabi/batpersent/"
-batpersent_module = "batpersent"
-batpersent_worksheet = wb1.create_sheet(title = batpersent_module)
-
-def iter_rows(ws,n):  #produce the list of items in the particular row
-        for row in ws.iter_rows(n):
-            yield [cell.value for cell in row]
-            
-def create_sheet_for_mot_klockwork(worksheet,sheet_module,cell):
-    n= 'A' + format(cell.row) + ':' + ('GH' + format(cell.row))
-    list_to_append = list(iter_rows(worksheet,n))
-    for items in list_to_append:
-        sheet_module.append(items)
-        
-for row in ws1.iter_rows():
-    for cell in row:
-        if  alert_announce_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,alert_announce_worksheet,cell)
-        elif  awsdm_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,awsdm_worksheet,cell)
-        elif bbrpc_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,bbrpc_worksheet,cell)
-        elif fulcrum_voip_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,fulcrum_voip_worksheet,cell)
-        elif gui_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,gui_worksheet,cell)
-        elif fota_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,fota_worksheet,cell)
-        elif get_hwid_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,get_hwid_worksheet,cell)
-        elif mediaserver_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,mediaserver_worksheet,cell)
-        elif sscep_client_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,sscep_client_worksheet,cell)
-        elif diag_log_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,diag_log_worksheet,cell)
-        elif diagtool_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,diagtool_worksheet,cell)
-        elif diagnostic_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,diagnostic_worksheet,cell)
-        elif error_handle_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,error_handle_worksheet,cell)
-        elif batpersent_path in cell.value:
-            create_sheet_for_mot_klockwork(ws1,batpersent_worksheet,cell)
-
-            
-wb1.save("apps.xlsx")
-print ("Klockwork parser is finished")
\ No newline at end of file
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from kwparser import load_registry
+from kwparser.metrics import Metrics
+from kwparser.output import StyledRows, issue_style
+from kwparser.xlsxreader import KlocworkWorkbook
+
+# Split the Klocwork export into one sheet per module.
+#
+# The export is streamed: every row is read exactly once by the fast xlsx
+# reader, classified on its file path (column A) only, then appended to a
+# write-only sheet, so memory stays flat however large the report is.
+# The modules come from the registry file (kwparser/modules.json).
+#
+# By default the sheets are saved back into the report file, which is what
+# the next steps read; the report sheet is then rewritten with every cell
+# of its rows (not only A:H) and its column widths, as the original script
+# kept them.  -o writes the sheets to a separate workbook instead, and
+# --per-module DIR writes one <module>.xlsx per module; either way the
+# input is left untouched.
+#
+# Reading, classifying and appending happen row by row in one loop; the
+# registry lookups are timed on their own and reported as the "classify"
+# stage, the rest of the loop as the "split" stage, and "save" is the final
+# write of the workbook(s).  --metrics writes the timings to a JSON file.
+
+report_file = 'apps.xlsx'
+
+log = logging.getLogger(__name__)
+
+
+def split_report(filename, registry, output=None, styled=False, metrics=None):
+    if metrics is None:
+        metrics = Metrics(filename)
+    wb_in = KlocworkWorkbook(filename)
+
+    wb_out = openpyxl.Workbook(write_only=True)
+    ws_all = wb_out.create_sheet(title = wb_in.active)
+    for index, width in wb_in.column_widths().items():
+        ws_all.column_dimensions[get_column_letter(index + 1)].width = width
+    module_worksheets = {}
+    for module in registry.names:
+        module_worksheets[module] = wb_out.create_sheet(title = module)
+    if styled:
+        style = issue_style(wb_out)
+        ws_all = StyledRows(ws_all, style)
+        for module in registry.names:
+            module_worksheets[module] = StyledRows(module_worksheets[module], style)
+
+    match = registry.match
+    clock = time.perf_counter
+    classify = 0.0
+    with metrics.stage('split', 'load') as stage:
+        rows = 0
+        # rows are copied at their full width, like the A:GH range the
+        # original script copied
+        for row in wb_in.iter_rows(width=None):
+            ws_all.append(row)
+            start = clock()
+            module = match(row[0])
+            classify += clock() - start
+            if module is not None:
+                module_worksheets[module].append(row)
+            rows += 1
+        stage.rows = metrics.rows = rows
+    metrics.split_off(stage, 'classify', 'classify', classify, rows)
+
+    # the reader keeps the file open until it is closed
+    wb_in.close()
+    with metrics.stage('save', 'save', rows):
+        wb_out.save(output or filename)
+
+
+def split_per_module(filename, registry, directory, styled=False, metrics=None):
+    """One write-only <module>.xlsx per module in `directory`."""
+    if metrics is None:
+        metrics = Metrics(filename)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    wb_in = KlocworkWorkbook(filename)
+
+    workbooks = {}
+    module_worksheets = {}
+    for module in registry.names:
+        wb_out = workbooks[module] = openpyxl.Workbook(write_only=True)
+        worksheet = wb_out.create_sheet(title = module)
+        if styled:
+            worksheet = StyledRows(worksheet, issue_style(wb_out))
+        module_worksheets[module] = worksheet
+
+    match = registry.match
+    clock = time.perf_counter
+    classify = 0.0
+    with metrics.stage('split', 'load') as stage:
+        rows = 0
+        for row in wb_in.iter_rows(width=None):
+            start = clock()
+            module = match(row[0])
+            classify += clock() - start
+            if module is not None:
+                module_worksheets[module].append(row)
+            rows += 1
+        stage.rows = metrics.rows = rows
+    metrics.split_off(stage, 'classify', 'classify', classify, rows)
+
+    wb_in.close()
+    with metrics.stage('save', 'save', rows):
+        for module, wb_out in workbooks.items():
+            wb_out.save(os.path.join(directory, "%s.xlsx" % module))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="split a Klocwork report into module sheets")
+    parser.add_argument('report', nargs='?', default=report_file)
+    parser.add_argument('--modules', help="module registry file (json, toml or yaml)")
+    parser.add_argument('-o', '--output', help="write the sheets here instead of into the report")
+    parser.add_argument('--per-module', metavar='DIR', help="write one workbook per module to DIR")
+    parser.add_argument('--styled', action='store_true',
+                        help="write the issue cells in one named (text) style")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="write the time, rows/s and peak memory of each stage to FILE")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(message)s")
+    metrics = Metrics(args.report)
+    registry = load_registry(args.modules)
+    if args.per_module:
+        split_per_module(args.report, registry, args.per_module, args.styled, metrics)
+    else:
+        split_report(args.report, registry, args.output, args.styled, metrics)
+    metrics.report()
+    if args.metrics:
+        metrics.write(args.metrics)
+    log.info("Klockwork parser is finished")
@@ -5,57 +5,70 @@ Created on Fri Dec 28 14:48:48 2018
 @author: zhuzhuojie
 """
 
-import openpyxl
-
-from openpyxl.worksheet.table import Table, TableStyleInfo
-
-wb1 = openpyxl.load_workbook('apps_awsdm.xlsx')
-
-ws1 = wb1.active
-
-critical_number = 0
-error_number = 0
-warning_number = 0
-review_number = 0
+import argparse
+import logging
+import os
+import sys
 
-for row in ws1.iter_rows():
-    for cell in row :
-        if cell.column == 'B':
-            if 'Critical' in cell.value:
-                critical_number = critical_number + 1
-                print ("### col :"+cell.column)
-            elif  'Error' in cell.value:
-                error_number = error_number + 1
-            elif  'Warning' in cell.value:
-                warning_number = warning_number + 1    
-            elif  'Review' in cell.value:
-                review_number = review_number + 1    
+import openpyxl
 
-print ("## awsdm critical_number :"+ format(critical_number))
-print ("## awsdm error_number :"+ format(error_number))
-print ("## awsdm warning_number :"+ format(warning_number))
-print ("## awsdm review_number :"+ format(review_number))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from kwparser.issues import IssueTable
+from kwparser.metrics import Metrics
+from kwparser.output import write_checker_sheet, write_summary_sheet
+from kwparser.pivot import build_cube
+from kwparser.xlsxreader import KlocworkWorkbook
+
+report_file = 'apps_awsdm.xlsx'
+
+# The module sheet is streamed across to a write-only copy of the workbook
+# and collected into an IssueTable; the summary is a view over the
+# module x severity x checker cube built from it.  The counts are logged
+# at debug level (-v); --metrics writes the time of each stage to a JSON
+# file.
+parser = argparse.ArgumentParser(description="summarize the module sheet of a split report")
+parser.add_argument('--metrics', metavar='FILE',
+                    help="write the time, rows/s and peak memory of each stage to FILE")
+parser.add_argument('-v', '--verbose', action='store_true',
+                    help="log the severity counts of the module")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                    format="%(message)s")
+log = logging.getLogger(__name__)
+metrics = Metrics(report_file)
+
+with metrics.stage('load', 'load') as stage:
+    wb_in = KlocworkWorkbook(report_file)
+    wb1 = openpyxl.Workbook(write_only=True)
+
+    # the summary and drill-down left by an earlier run are replaced
+    sheets = [sheet for sheet in wb_in.sheetnames
+              if 'summary' not in sheet and not sheet.endswith('_checkers')]
+    issues = IssueTable.from_sheets(wb_in, sheets, copy_to=wb1)
+    wb_in.close()
+    stage.rows = metrics.rows = len(issues)
+
+# the active sheet holds the module's issues and is named after it
+module = wb_in.active
+with metrics.stage('cube', 'aggregate', len(issues)):
+    cube = build_cube(issues, [module])
+
+for severity, number in cube.severity_counts(module).items():
+    log.debug("## %s %s_number :%s", module, severity.lower(), number)
 
 summary_module = "summary"
 
-summary_worksheet = wb1.create_sheet(title = summary_module)
-
-# add column headings. NB. these must be strings
-summary_worksheet.append(["module", "(1)Critical", "(2)Error", "(3)Warning", "(4)Review"])
-summary_worksheet.append(["awsdm", critical_number, error_number, warning_number, review_number])
-
-tab = Table(displayName="Table1", ref="A1:E2")
-
-# Add a default style with striped rows and banded columns
-#style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
-#                       showLastColumn=False, showRowStripes=True, showColumnStripes=True)
-
-style = TableStyleInfo(name="TableStyleMedium4", showFirstColumn=False,
-                       showLastColumn=True, showRowStripes=False, showColumnStripes=True)
+with metrics.stage('save', 'save', len(issues)):
+    # tables sized to the rows written, with totals rows
+    write_summary_sheet(wb1, cube.summary_header(), cube.summary_rows(), title=summary_module,
+                        totals=True)
+    write_checker_sheet(wb1, cube, module, totals=True)
 
-tab.tableStyleInfo = style
-summary_worksheet.add_table(tab)
+    wb1.save(report_file)
 
-wb1.save("apps_awsdm.xlsx")
+metrics.report()
+if args.metrics:
+    metrics.write(args.metrics)
 
-print ("apps awsdm is finished")
\ No newline at end of file
+log.info("apps awsdm is finished")
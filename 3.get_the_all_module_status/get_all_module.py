@@ -5,72 +5,112 @@ Created on Fri Dec 28 16:12:33 2018
 @author: zhuzhuojie
 """
 
-import openpyxl
-
-from openpyxl.worksheet.table import Table, TableStyleInfo
-
-wb1 = openpyxl.load_workbook('apps_all_module.xlsx')
-
-sheets = {}
+import argparse
+import logging
+import os
+import sys
+import tempfile
 
+import openpyxl
+from openpyxl.utils import get_column_letter
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from kwparser.metrics import Metrics
+from kwparser.output import write_checker_breakdown, write_summary_sheet
+from kwparser.parallel import read_sheets
+from kwparser.pivot import merge_cubes
+from kwparser.sheetxml import splice_sheets
+from kwparser.xlsxreader import KlocworkWorkbook, sheet_names
 
-ws1 = wb1.active
+report_file = 'apps_all_module.xlsx'
 
 summary_module = "summary"
-
-summary_worksheet = wb1.create_sheet('summary',0)
-
-summary_worksheet.append(["module", "(1)Critical", "(2)Error", "(3)Warning", "(4)Review"])
-tab = Table(displayName="Table1", ref="A1:E15")
-
-
-def add_number_for_module(worksheet,sheet_module,summary):
-    critical_number = 0
-    error_number = 0
-    warning_number = 0
-    review_number = 0
-
-    for row in worksheet.iter_rows():
-        for cell in row :
-            if cell.column == 'B':
-                print ("## cell.value:"+cell.value)
-                if 'Critical' in cell.value:
-                    critical_number = critical_number + 1
-                elif  'Error' in cell.value:
-                    error_number = error_number + 1
-                elif  'Warning' in cell.value:
-                    warning_number = warning_number + 1    
-                elif  'Review' in cell.value:
-                    review_number = review_number + 1    
-
-    print ("## critical_number :"+ format(critical_number))
-    print ("## error_number :"+ format(error_number))
-    print ("## warning_number :"+ format(warning_number))
-    print ("## review_number :"+ format(review_number))
-
-    summary.append([sheet_module, critical_number, error_number, warning_number, review_number])
-
-
-for sheet in wb1.get_sheet_names():
-    print("## sheet : "+sheet)
-    sheets[sheet] = wb1[sheet]
-    if 'summary' not in sheet:
-        add_number_for_module(sheets[sheet],sheet,summary_worksheet)
-
-
-
-# Add a default style with striped rows and banded columns
-#style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
-#                       showLastColumn=False, showRowStripes=True, showColumnStripes=True)
-
-style = TableStyleInfo(name="TableStyleMedium4", showFirstColumn=False,
-                       showLastColumn=True, showRowStripes=False, showColumnStripes=True)
-
-tab.tableStyleInfo = style
-summary_worksheet.add_table(tab)
-
-
-wb1.save("apps_all_module.xlsx")
-
-print ("get all summery is finished")
\ No newline at end of file
+checker_module = "checkers"
+
+log = logging.getLogger(__name__)
+
+# Every module sheet is cut into chunks of rows, and each chunk is counted
+# into a module x severity x checker cube and serialized, every column of
+# it, to a file; the cubes are summed into the one the summary is a view
+# over, and the files are spliced into the empty module sheets of the saved
+# workbook.  The summary (with totals) and the checker x module breakdown
+# are written as tables sized to their rows.
+#
+# With --jobs N the chunks are read by N worker processes, so that the
+# largest sheet is spread over them as well.
+#
+# The sheets and summary rows are logged at debug level (-v), and the
+# time of each stage can be written to a JSON file with --metrics.
+
+
+def count_modules(filename, module_sheets, wb1, jobs, directory, metrics):
+    """Count the module sheets into a cube, creating them (empty, with their
+    column widths) in wb1; returns the cube and the files of their rows."""
+    cubes = []
+    fragments = dict((sheet, []) for sheet in module_sheets)
+    with metrics.stage('load', 'load') as stage:
+        with KlocworkWorkbook(filename) as wb_in:
+            for sheet in module_sheets:
+                worksheet = wb1.create_sheet(sheet)
+                for index, width in wb_in.column_widths(sheet).items():
+                    worksheet.column_dimensions[get_column_letter(index + 1)].width = width
+        stage.rows = 0
+        for chunk, cube, rows, path in read_sheets(filename, module_sheets, jobs, directory):
+            cubes.append(cube)
+            fragments[chunk.sheet].append(path)
+            stage.rows += rows
+    metrics.rows = stage.rows
+    with metrics.stage('merge', 'aggregate'):
+        return merge_cubes(cubes), fragments
+
+
+def get_all_module(filename, jobs=1, metrics=None):
+    if metrics is None:
+        metrics = Metrics(filename)
+    # the summary and breakdown left by an earlier run are replaced
+    module_sheets = [sheet for sheet in sheet_names(filename)
+                     if 'summary' not in sheet and sheet != checker_module]
+    for sheet in module_sheets:
+        log.debug("## sheet : %s", sheet)
+
+    wb1 = openpyxl.Workbook(write_only=True)
+    # created first so it comes first; filled in once the cube is built
+    summary_worksheet = wb1.create_sheet(summary_module)
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(filename))) as directory:
+        cube, fragments = count_modules(filename, module_sheets, wb1, jobs, directory, metrics)
+
+        rows = cube.summary_rows()
+        if log.isEnabledFor(logging.DEBUG):
+            for row in rows:
+                log.debug("## %s", " ".join(format(value) for value in row))
+        with metrics.stage('save', 'save', metrics.rows):
+            # the table is sized to the modules found, with a totals row
+            write_summary_sheet(wb1, cube.summary_header(), rows, worksheet=summary_worksheet,
+                                totals=True)
+            write_checker_breakdown(wb1, cube, title=checker_module)
+
+            wb1.save(filename)
+            splice_sheets(filename, fragments)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="summarize the module sheets of a split report")
+    parser.add_argument('report', nargs='?', default=report_file)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="read the sheets in N worker processes")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="write the time, rows/s and peak memory of each stage to FILE")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="log the sheets and the summary rows")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(message)s")
+    metrics = Metrics(args.report)
+    get_all_module(args.report, args.jobs, metrics)
+    metrics.report()
+    if args.metrics:
+        metrics.write(args.metrics)
+
+    log.info("get all summery is finished")
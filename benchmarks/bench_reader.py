@@ -0,0 +1,65 @@
+"""
+Compare the fast OOXML reader with openpyxl on a Klocwork export.
+
+    python benchmarks/bench_reader.py [report.xlsx] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import openpyxl
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from kwparser.xlsxreader import iter_rows
+
+DEFAULT_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              os.pardir, 'raw_data', 'apps.xlsx')
+
+
+def load_workbook_full(filename):
+    wb = openpyxl.load_workbook(filename)
+    return sum(1 for row in wb.active.iter_rows(max_col=8, values_only=True))
+
+
+def load_workbook_read_only(filename):
+    wb = openpyxl.load_workbook(filename, read_only=True)
+    count = sum(1 for row in wb.active.iter_rows(max_col=8, values_only=True))
+    wb.close()
+    return count
+
+
+def fast_reader(filename):
+    return sum(1 for row in iter_rows(filename))
+
+
+def best_of(func, filename, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        rows = func(filename)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return rows, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('report', nargs='?', default=DEFAULT_REPORT)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for func in (load_workbook_full, load_workbook_read_only, fast_reader):
+        rows, elapsed = best_of(func, args.report, args.repeat)
+        results.append((func.__name__, rows, elapsed))
+
+    baseline = results[0][2]
+    for name, rows, elapsed in results:
+        print("%-24s %8d rows %8.3fs %6.1fx" % (name, rows, elapsed, baseline / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Time and memory-profile the report stages on synthetic reports.
+
+For every size the synthetic export is generated once (and kept under
+benchmarks/data/), then the load, split, summary and awsdm stages run in
+turn.  Each result is appended to benchmarks/results.jsonl together with
+the git revision, and compared with the previous result for the same size
+and stage (with or without tracemalloc) so that regressions show up
+between versions.
+
+    python benchmarks/bench_stages.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from openpyxl import Workbook
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, os.pardir))
+from kwparser.output import write_checker_sheet, write_module_sheets, write_summary_sheet
+from kwparser.pipeline import load_issues
+from kwparser.pivot import build_cube
+from kwparser.registry import load_registry
+from synth_report import ReportGenerator, write_report
+
+DATA_DIR = os.path.join(HERE, 'data')
+RESULTS = os.path.join(HERE, 'results.jsonl')
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def synthetic_report(rows, seed=0):
+    filename = os.path.join(DATA_DIR, 'synth_%d_%d.xlsx' % (rows, seed))
+    if not os.path.exists(filename):
+        if not os.path.isdir(DATA_DIR):
+            os.makedirs(DATA_DIR)
+        print("generating %s" % filename)
+        write_report(filename, ReportGenerator(seed).rows(rows))
+    return filename
+
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=HERE,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def stage_split(context):
+    wb = Workbook(write_only=True)
+    write_module_sheets(wb, context['table'], context['registry'].names)
+    wb.save(context['output'])
+
+
+def stage_summary(context):
+    cube = context['cube'] = build_cube(context['table'], context['registry'].names)
+    wb = Workbook(write_only=True)
+    write_summary_sheet(wb, cube.summary_header(), cube.summary_rows())
+    wb.save(context['output'])
+
+
+def stage_awsdm(context):
+    table = context['table']
+    wb = Workbook(write_only=True)
+    write_checker_sheet(wb, context['cube'], 'awsdm')
+    write_module_sheets(wb, table.take(table.mask('module', 'awsdm')), ['awsdm'])
+    wb.save(context['output'])
+
+
+def measure(func, context, memory):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(context)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_size(rows, registry, memory):
+    report = synthetic_report(rows)
+    handle, output = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    context = {'registry': registry, 'output': output}
+    stages = [
+        ('load', lambda context: context.update(table=load_issues(report, registry))),
+        ('split', stage_split),
+        ('summary', stage_summary),
+        ('awsdm', stage_awsdm),
+    ]
+    results = []
+    try:
+        for name, func in stages:
+            result, elapsed, peak = measure(func, context, memory)
+            results.append({
+                'rows': rows,
+                'stage': name,
+                'seconds': round(elapsed, 4),
+                'rows_per_sec': round(rows / elapsed) if elapsed else None,
+                'peak_mb': round(peak / 2.0 ** 20, 1) if peak is not None else None,
+            })
+    finally:
+        os.remove(output)
+    return results
+
+
+def previous_results(filename):
+    previous = {}
+    if os.path.exists(filename):
+        with open(filename) as f:
+            for line in f:
+                record = json.loads(line)
+                previous[(record['rows'], record['stage'], record.get('traced'))] = record
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--results', default=RESULTS)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip tracemalloc (it slows the stages down)")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="flag stages this much slower than the last run (default 0.2)")
+    args = parser.parse_args()
+
+    registry = load_registry()
+    previous = previous_results(args.results)
+    stamp = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+             'revision': revision(), 'python': sys.version.split()[0],
+             'traced': args.memory}
+
+    with open(args.results, 'a') as out:
+        for rows in args.sizes:
+            for result in run_size(rows, registry, args.memory):
+                result.update(stamp)
+                out.write(json.dumps(result, sort_keys=True) + '\n')
+                last = previous.get((rows, result['stage'], result['traced']))
+                change = ''
+                if last is not None and last['seconds']:
+                    ratio = result['seconds'] / last['seconds'] - 1
+                    change = "%+6.1f%% vs %s" % (100 * ratio, last.get('revision'))
+                    if ratio > args.threshold:
+                        change += "  REGRESSION"
+                print("%8d %-8s %8.3fs %10s rows/s %8s MB  %s" % (
+                    rows, result['stage'], result['seconds'], result['rows_per_sec'],
+                    result['peak_mb'], change))
+
+
+if __name__ == '__main__':
+    main()
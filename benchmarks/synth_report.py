@@ -0,0 +1,172 @@
+"""
+Generate a synthetic Klocwork export of any size.
+
+The columns follow the distribution of raw_data/apps.xlsx: about half of the
+issues come from the shared gcc work directory, two fifths from native and
+cross recipes and the rest from target recipes (including every module of
+the registry), with the real checker and severity mix.
+
+    python benchmarks/synth_report.py 100000 -o synth_100k.xlsx
+"""
+
+import argparse
+import os
+import random
+import sys
+from itertools import accumulate
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from kwparser.registry import load_registry
+
+WORKSPACE = "/data/cyk016/FulcrumWorkspace/FulcrumVariants/repo_app/motoapps/poky/build/tmp-glibc/"
+
+TARGET_ARCH = "armv7a-vfp-neon-oe-linux-gnueabi"
+NATIVE_ARCH = "x86_64-linux"
+
+SHARED = [("gcc-4.9.3-r0", "gcc-4.9.3")]
+
+NATIVE_RECIPES = [
+    ("binutils-native", "2.25.1-r0", "git"),
+    ("binutils-cross-arm", "2.25.1-r0", "git"),
+    ("sqlite3-native", "3.8.10.2-r0", "sqlite-autoconf-3081002"),
+    ("openssl-native", "1.0.2d-r0", "openssl-1.0.2d"),
+    ("db-native", "6.0.30-r0", "db-6.0.30"),
+    ("python-native", "2.7.9-r1", "Python-2.7.9"),
+    ("libarchive-native", "3.1.2-r0", "libarchive-3.1.2"),
+    ("elfutils-native", "0.161-r0", "elfutils-0.161"),
+]
+
+TARGET_RECIPES = [
+    ("sqlite3", "3.8.10.2-r0", "sqlite-autoconf-3081002"),
+    ("openssl", "1.0.2d-r0", "openssl-1.0.2d"),
+    ("db", "6.0.30-r0", "db-6.0.30"),
+    ("python", "2.7.9-r1", "Python-2.7.9"),
+    ("busybox", "1.23.2-r0", "busybox-1.23.2"),
+]
+
+# share of the rows per kind of work directory
+WORKDIRS = [("shared", 0.49), ("native", 0.41), ("target", 0.10)]
+
+SEVERITIES = [("Critical", 0.759), ("Error", 0.164), ("Review", 0.073), ("Warning", 0.004)]
+
+STATES = [("Existing", 0.998), ("New", 0.002)]
+
+# checker -> message template; {i}/{f} are identifiers, {l} line numbers, {n} sizes
+CHECKERS = [
+    ("ABV.GENERAL", 0.26, "Array '{i}' of size {n} may use index value(s) {n}..{n}"),
+    ("ABV.STACK", 0.20, "Array '{i}' of size {n} may use index value(s) 0..{n}. Also there is one similar error on line {l}."),
+    ("NPD.FUNC.MUST", 0.10, "Pointer '{i}' returned from call to function '{f}' at line {l} may be NULL and will be dereferenced at line {l}."),
+    ("MLK.MIGHT", 0.09, "Possible memory leak. Dynamic memory stored in '{i}' allocated through function '{f}' at line {l} can be lost at line {l}"),
+    ("CWARN.BITOP.SIZE", 0.06, "Operand of bitwise operation has type that is smaller than other operand."),
+    ("MLK.MUST", 0.045, "Memory leak. Dynamic memory stored in '{i}' allocated through function '{f}' at line {l} is lost at line {l}"),
+    ("NPD.FUNC.MIGHT", 0.042, "Pointer '{i}' returned from call to function '{f}' at line {l} may be NULL and may be dereferenced at line {l}."),
+    ("NPD.CHECK.MUST", 0.03, "Pointer '{i}' checked for NULL at line {l} will be dereferenced at line {l}."),
+    ("NPD.CHECK.MIGHT", 0.027, "Pointer '{i}' checked for NULL at line {l} may be dereferenced at line {l}. Also there are 2 similar errors on lines {l}, {l}."),
+    ("NPD.GEN.MIGHT", 0.019, "Null pointer '{i}' that comes from line {l} may be dereferenced at line {l}."),
+    ("NPD.GEN.MUST", 0.018, "Null pointer '{i}' that comes from line {l} will be dereferenced at line {l}."),
+    ("RCA", 0.011, "Assignment to '{i}' is not used."),
+    ("SV.TAINTED.PATH_TRAVERSAL", 0.009, "Unvalidated string '{i}' is received from an external function through a call to '{f}' at line {l}."),
+    ("RH.LEAK", 0.008, "Resource acquired to '{i}' at line {l} is lost here."),
+    ("UNINIT.STACK.MIGHT", 0.007, "'{i}' might be used uninitialized in this function."),
+    ("INFINITE_LOOP.LOCAL", 0.002, "Infinite loop"),
+]
+
+SOURCE_DIRS = ["src", "lib", "gcc", "gcc/cp", "bfd", "ld", "libiberty", "Modules", "crypto/x509", "parser", "app"]
+
+
+class Weighted(object):
+    """Weighted choice with the cumulative weights computed once."""
+
+    def __init__(self, weighted):
+        self.values = [value for value, weight in weighted]
+        self.cum_weights = list(accumulate(weight for value, weight in weighted))
+
+    def pick(self, rng):
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+
+class ReportGenerator(object):
+    """Deterministic (seeded) stream of synthetic report rows."""
+
+    def __init__(self, seed=0, registry=None):
+        self.rng = random.Random(seed)
+        if registry is None:
+            registry = load_registry()
+        # every registered module gets target rows of its own
+        self.module_dirs = [module.path for module in registry]
+        self.identifiers = ["%s%d" % (prefix, i) for prefix in ("buf", "ptr", "node", "ctx", "p")
+                            for i in range(40)]
+        self.functions = ["%s_%s" % (verb, noun)
+                          for verb in ("parse", "read", "write", "init", "free", "get", "set", "handle")
+                          for noun in ("dir_list", "packet", "config", "entry", "buffer", "table",
+                                       "section", "symbol", "node", "state", "header")]
+        self.workdirs = Weighted(WORKDIRS)
+        self.severities = Weighted(SEVERITIES)
+        self.states = Weighted(STATES)
+        self.checkers = Weighted([(entry, entry[1]) for entry in CHECKERS])
+
+    def _file(self):
+        rng = self.rng
+        kind = self.workdirs.pick(rng)
+        name = "%s%d.c" % (rng.choice(("tree", "util", "main", "io", "elf32-arm", "call")), rng.randrange(60))
+        if kind == "shared":
+            recipe, source = rng.choice(SHARED)
+            return "%swork-shared/%s/%s/%s/%s" % (WORKSPACE, recipe, source, rng.choice(SOURCE_DIRS), name)
+        if kind == "native":
+            recipe, version, source = rng.choice(NATIVE_RECIPES)
+            return "%swork/%s/%s/%s/%s/%s/%s" % (WORKSPACE, NATIVE_ARCH, recipe, version, source,
+                                                 rng.choice(SOURCE_DIRS), name)
+        if rng.random() < 0.3:
+            prefix = rng.choice(self.module_dirs)
+            pos = prefix.find("poky/build/tmp-glibc/")
+            return "%s%s%s/%s" % (WORKSPACE, prefix[pos + len("poky/build/tmp-glibc/"):],
+                                   rng.choice(SOURCE_DIRS), name)
+        recipe, version, source = rng.choice(TARGET_RECIPES)
+        return "%swork/%s/%s/%s/%s/%s/%s" % (WORKSPACE, TARGET_ARCH, recipe, version, source,
+                                             rng.choice(SOURCE_DIRS), name)
+
+    def _message(self, template):
+        rng = self.rng
+        message = template
+        while "{" in message:
+            message = (message.replace("{i}", rng.choice(self.identifiers), 1)
+                              .replace("{f}", rng.choice(self.functions), 1)
+                              .replace("{l}", str(rng.randrange(1, 12000)), 1)
+                              .replace("{n}", str(rng.randrange(1, 300)), 1))
+        return message
+
+    def row(self):
+        rng = self.rng
+        checker, weight, template = self.checkers.pick(rng)
+        return (self._file(), self.severities.pick(rng), checker, rng.choice(self.functions),
+                self._message(template), self.states.pick(rng), "Analyze", "unowned")
+
+    def rows(self, count):
+        for i in range(count):
+            yield self.row()
+
+
+def write_report(filename, rows, title="APPS_SYNTH"):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for row in rows:
+        ws.append(row)
+    wb.save(filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('-o', '--output')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    output = args.output or "synth_%d.xlsx" % args.rows
+    write_report(output, ReportGenerator(args.seed).rows(args.rows))
+    print("%s: %d rows" % (output, args.rows))
+
+
+if __name__ == '__main__':
+    main()
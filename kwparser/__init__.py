@@ -0,0 +1,8 @@
+"""
+Shared helpers for the Klocwork report scripts.
+"""
+
+from .registry import Module, PathMatcher, Registry, load_registry
+from .xlsxreader import REPORT_COLUMNS, KlocworkWorkbook, iter_rows, sheet_names
+from .issues import Column, IssueTable
+from .pivot import SEVERITIES, Cube, build_cube
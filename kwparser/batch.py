@@ -0,0 +1,130 @@
+"""
+Run the report pipeline over many Klocwork exports at once.
+
+The exports are processed by a bounded process pool.  The registry (with
+its compiled path matcher), the prefilter and the validator are built once
+in the parent and handed to each worker when it starts, not with every
+file.  Each worker writes the report of its export and sends back only the count cube,
+from which the parent builds a combined summary across all exports.
+"""
+
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from openpyxl import Workbook
+
+from .output import add_summary_table, table_ref, write_summary_sheet
+from .pipeline import DEFAULT_DRILLDOWN, run_report
+from .pivot import merge_cubes
+
+log = logging.getLogger(__name__)
+
+SUMMARY_FILE = "summary.xlsx"
+
+_registry = None
+_prefilter = None
+_validator = None
+
+
+def find_exports(patterns):
+    """Export files named by `patterns`: files, globs or directories (all
+    their .xlsx files), in order and without duplicates."""
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '*.xlsx')))
+        else:
+            matches = sorted(glob.glob(pattern)) or [pattern]
+        for filename in matches:
+            # skip Excel's lock files
+            if not os.path.basename(filename).startswith('~$') and filename not in found:
+                found.append(filename)
+    return found
+
+
+def report_path(directory, source):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(directory, "%s_report.xlsx" % stem)
+
+
+def _init_worker(registry, prefilter, validator, level):
+    global _registry, _prefilter, _validator
+    _registry = registry
+    _prefilter = prefilter
+    _validator = validator
+    logging.getLogger(__package__).setLevel(level)
+
+
+def _run_one(source, output, drilldown):
+    start = time.perf_counter()
+    if _prefilter is not None:
+        _prefilter.dropped.clear()
+    if _validator is not None:
+        _validator.clear()
+    table, cube = run_report(source, output, _registry, drilldown, _prefilter,
+                             validator=_validator)
+    return len(table), cube, time.perf_counter() - start
+
+
+def run_batch(sources, directory, registry, prefilter=None, jobs=None,
+              drilldown=DEFAULT_DRILLDOWN, verbose=False, validator=None):
+    """Write `<directory>/<export>_report.xlsx` for each of `sources` and a
+    combined `<directory>/summary.xlsx`; returns {source: cube}."""
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    outputs = [report_path(directory, source) for source in sources]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError("several exports have the same file name")
+
+    cubes = {}
+    failed = []
+    level = logging.DEBUG if verbose else logging.WARNING
+    start = time.perf_counter()
+    with ProcessPoolExecutor(jobs, initializer=_init_worker,
+                             initargs=(registry, prefilter, validator, level)) as pool:
+        futures = dict((pool.submit(_run_one, source, output, drilldown), source)
+                       for source, output in zip(sources, outputs))
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                issues, cube, seconds = future.result()
+            except Exception as e:
+                log.error("%s: failed: %s", source, e)
+                failed.append(source)
+                continue
+            cubes[source] = cube
+            log.info("%s: %d issues in %.2fs", source, issues, seconds)
+    log.info("%d exports in %.2fs, %d failed", len(sources), time.perf_counter() - start,
+             len(failed))
+
+    done = [source for source in sources if source in cubes]
+    if done:
+        write_batch_summary(os.path.join(directory, SUMMARY_FILE),
+                            [(source, cubes[source]) for source in done])
+    return cubes
+
+
+def write_batch_summary(filename, cubes):
+    """Totals of all exports, and the severity counts of every module of
+    every export."""
+    merged = merge_cubes([cube for source, cube in cubes])
+    wb = Workbook(write_only=True)
+    write_summary_sheet(wb, merged.summary_header(), merged.summary_rows())
+
+    worksheet = wb.create_sheet("exports")
+    header = ["export"] + merged.summary_header()
+    worksheet.append(header)
+    rows = 0
+    for source, cube in cubes:
+        name = os.path.splitext(os.path.basename(source))[0]
+        for module in cube.modules:
+            counts = cube.severity_counts(module)
+            worksheet.append([name, module] + [counts.get(severity, 0)
+                                               for severity in merged.severities])
+            rows += 1
+    add_summary_table(worksheet, table_ref(len(header), rows + 1), header, name="Exports")
+    wb.save(filename)
+    log.info("%s: written", filename)
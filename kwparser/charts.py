@@ -0,0 +1,90 @@
+"""
+Dashboard of per-module charts.
+
+A ChartTemplate holds the settings of one kind of chart (type, style,
+size, axis titles); bind() builds a chart with those settings over a data
+range.  Charts are constructed directly rather than deep-copied from a
+prototype, share the axes of their template and refer to the summary and
+trend sheets by range string, so adding a module costs two small charts
+and no copying.  The dashboard is laid out in one pass, one row of charts
+per module.
+"""
+
+from openpyxl.chart import BarChart, LineChart, Reference
+from openpyxl.utils import get_column_letter, quote_sheetname
+
+# rows and columns taken by one chart on the dashboard
+CHART_ROWS = 15
+CHART_COLUMNS = 9
+
+
+class ChartTemplate(object):
+
+    def __init__(self, factory, style=10, width=15, height=7, x_title=None, y_title=None,
+                 **options):
+        self.factory = factory
+        self.style = style
+        self.width = width
+        self.height = height
+        self.options = options
+        # the axes (with their titles) are built once and shared by every
+        # chart of the template: serializing a chart only reads them
+        prototype = factory()
+        self.x_axis = prototype.x_axis
+        self.y_axis = prototype.y_axis
+        if x_title:
+            self.x_axis.title = x_title
+        if y_title:
+            self.y_axis.title = y_title
+
+    def bind(self, data, categories, title, from_rows=False):
+        """Chart of the range string `data` (series titles in its first
+        cell), with `categories` on the x axis."""
+        chart = self.factory()
+        chart.style = self.style
+        chart.width = self.width
+        chart.height = self.height
+        for name, value in self.options.items():
+            setattr(chart, name, value)
+        chart.x_axis = self.x_axis
+        chart.y_axis = self.y_axis
+        chart.title = title
+        chart.add_data(Reference(range_string=data), titles_from_data=True, from_rows=from_rows)
+        chart.set_categories(Reference(range_string=categories))
+        return chart
+
+
+SEVERITY_CHART = ChartTemplate(BarChart, style=10, y_title="issues", type="col")
+
+TREND_CHART = ChartTemplate(LineChart, style=12, x_title="build", y_title="Critical issues")
+
+
+def _range(title, min_col, min_row, max_col, max_row):
+    return "%s!$%s$%d:$%s$%d" % (quote_sheetname(title), get_column_letter(min_col), min_row,
+                                  get_column_letter(max_col), max_row)
+
+
+def write_dashboard(workbook, modules, severities, summary="summary", trend=None, builds=0,
+                    title="dashboard"):
+    """Sheet with a severity bar chart per module (from the `summary`
+    sheet) and, with a `trend` sheet of `builds` rows, its Critical trend.
+
+    The summary sheet has one row per module after the header, the trend
+    sheet one column per module after the build and timestamp columns.
+    """
+    worksheet = workbook.create_sheet(title)
+    width = len(severities) + 1
+    categories = _range(summary, 2, 1, width, 1)
+    for i, module in enumerate(modules):
+        anchor_row = 1 + i * CHART_ROWS
+        row = i + 2
+        chart = SEVERITY_CHART.bind(_range(summary, 1, row, width, row), categories, module,
+                                    from_rows=True)
+        worksheet.add_chart(chart, "A%d" % anchor_row)
+        if trend is not None and builds:
+            column = i + 3
+            chart = TREND_CHART.bind(_range(trend, column, 1, column, builds + 1),
+                                     _range(trend, 1, 2, 1, builds + 1), module)
+            worksheet.add_chart(chart, "%s%d" % (get_column_letter(1 + CHART_COLUMNS),
+                                                 anchor_row))
+    return worksheet
@@ -0,0 +1,195 @@
+"""
+Command line entry points.
+"""
+
+import argparse
+import logging
+import os
+
+from .batch import find_exports, run_batch
+from .diff import run_diff
+from .metrics import Metrics
+from .pipeline import DEFAULT_DRILLDOWN, run_incremental, run_report, run_sharded
+from .prefilter import load_prefilter
+from .registry import load_registry
+from .trend import TrendStore
+from .validate import Validator
+
+log = logging.getLogger(__name__)
+
+
+def _setup_logging(verbose):
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO,
+                        format="%(message)s")
+
+
+# options of the full report, which --shards and --incremental do not write
+SINGLE_REPORT_OPTIONS = (('drilldown', '--drilldown'), ('dirs', '--dirs'),
+                         ('clusters', '--clusters'), ('db', '--db'), ('trend', '--trend'),
+                         ('build', '--build'), ('hotspots', '--hotspots'),
+                         ('severity_sheets', '--severity-sheets'), ('charts', '--charts'),
+                         ('metrics_sheet', '--metrics-sheet'))
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError("%s is not a positive number" % value)
+    return number
+
+
+def _default_output(report, suffix):
+    stem = os.path.splitext(report)[0]
+    return "%s_%s.xlsx" % (stem, suffix)
+
+
+def report_main(argv=None):
+    """kw-report: turn a raw Klocwork export into the module report."""
+    parser = argparse.ArgumentParser(prog='kw-report',
+                                     description="split and summarize a Klocwork export")
+    parser.add_argument('report', help="Klocwork export (xlsx)")
+    parser.add_argument('-o', '--output', help="report workbook (default: <report>_report.xlsx)")
+    parser.add_argument('--modules', help="module registry file (json, toml or yaml)")
+    parser.add_argument('--drilldown', action='append', metavar='MODULE',
+                        help="add a per-checker sheet for MODULE (default: %s)"
+                        % ", ".join(DEFAULT_DRILLDOWN))
+    parser.add_argument('--incremental', metavar='DIR',
+                        help="keep one workbook per module in DIR and rebuild only "
+                        "the modules that changed since the last run")
+    parser.add_argument('--shards', metavar='DIR',
+                        help="write each module to its own workbook in DIR, in parallel; "
+                        "the output then holds the summary with links to them")
+    parser.add_argument('-j', '--jobs', type=int,
+                        help="worker processes for --shards (default: one per CPU)")
+    parser.add_argument('--no-prefilter', dest='prefilter', action='store_false',
+                        help="keep the rows the registry's prefilter rules would drop")
+    parser.add_argument('--no-validate', dest='validate', action='store_false',
+                        help="do not check the rows for cells shifted or split by their "
+                        "message, nor quarantine the broken ones")
+    parser.add_argument('--dedup', action='store_true',
+                        help="collapse issues reported for several build variants of the "
+                        "same source (most useful with --no-prefilter)")
+    parser.add_argument('--dirs', action='store_true',
+                        help="add a per-directory drill-down sheet for each --drilldown module")
+    parser.add_argument('--clusters', action='store_true',
+                        help="add a sheet grouping the issues by checker and message template")
+    parser.add_argument('--db', metavar='FILE',
+                        help="also load the issues into the SQLite database FILE")
+    parser.add_argument('--trend', metavar='DIR',
+                        help="append the counts to the trend store in DIR and add the "
+                        "trend and movers sheets")
+    parser.add_argument('--build', help="build id for --trend (default: the report name, "
+                        "with a -2, -3... suffix if the store already has it)")
+    parser.add_argument('--hotspots', type=_positive_int, metavar='N',
+                        help="add sheets of the N files, functions and checkers with the "
+                        "most Critical issues in each module")
+    parser.add_argument('--report-order', dest='sort', action='store_false',
+                        help="keep the issues in export order instead of sorting them by "
+                        "severity, checker and file")
+    parser.add_argument('--severity-sheets', action='store_true',
+                        help="add one sheet per severity with the issues of all modules")
+    parser.add_argument('--charts', action='store_true',
+                        help="add a dashboard sheet with severity (and, with --trend, "
+                        "Critical trend) charts per module")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="write the time, rows/s and peak memory of every stage to the "
+                        "JSON file FILE")
+    parser.add_argument('--metrics-sheet', action='store_true',
+                        help="add a metrics sheet with the stage timings to the report")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    if args.shards and args.incremental:
+        parser.error("--shards and --incremental cannot be combined")
+    if args.shards or args.incremental:
+        unsupported = [option for name, option in SINGLE_REPORT_OPTIONS
+                       if getattr(args, name) not in (None, False)]
+        if unsupported:
+            parser.error("%s cannot be combined with %s"
+                         % ("--shards" if args.shards else "--incremental",
+                            ", ".join(unsupported)))
+    if args.build is not None and not args.trend:
+        parser.error("--build needs --trend")
+    if args.trend and args.build is not None and args.build in TrendStore(args.trend):
+        parser.error("build %s is already in the trend store %s" % (args.build, args.trend))
+
+    _setup_logging(args.verbose)
+    output = args.output or _default_output(args.report, 'report')
+    drilldown = args.drilldown if args.drilldown is not None else DEFAULT_DRILLDOWN
+    registry = load_registry(args.modules)
+    prefilter = load_prefilter(args.modules) if args.prefilter else None
+    validator = Validator(anchor=registry.anchor) if args.validate else None
+    metrics = Metrics(args.report)
+    if args.shards:
+        run_sharded(args.report, output, registry, args.shards, jobs=args.jobs,
+                    prefilter=prefilter, deduplicate=args.dedup, sort=args.sort,
+                    validator=validator, metrics=metrics)
+    elif args.incremental:
+        run_incremental(args.report, output, registry, args.incremental, prefilter=prefilter,
+                        deduplicate=args.dedup, sort=args.sort, validator=validator,
+                        metrics=metrics)
+    else:
+        run_report(args.report, output, registry, drilldown=drilldown, prefilter=prefilter,
+                   deduplicate=args.dedup, directories=args.dirs, clustering=args.clusters,
+                   database=args.db, trend_dir=args.trend, build=args.build,
+                   top=args.hotspots, sort=args.sort, severity_sheets=args.severity_sheets,
+                   charts=args.charts, validator=validator, metrics=metrics,
+                   metrics_sheet=args.metrics_sheet)
+    metrics.report()
+    if args.metrics:
+        metrics.write(args.metrics)
+        log.info("%s: written", args.metrics)
+    return 0
+
+
+def diff_main(argv=None):
+    """kw-diff: new, fixed and unchanged issues between two exports."""
+    parser = argparse.ArgumentParser(prog='kw-diff',
+                                     description="compare two Klocwork exports")
+    parser.add_argument('old', help="earlier Klocwork export (xlsx)")
+    parser.add_argument('new', help="later Klocwork export (xlsx)")
+    parser.add_argument('-o', '--output', help="diff workbook (default: <new>_diff.xlsx)")
+    parser.add_argument('--modules', help="module registry file (json, toml or yaml)")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    _setup_logging(args.verbose)
+    output = args.output or _default_output(args.new, 'diff')
+    run_diff(args.old, args.new, output, load_registry(args.modules))
+    return 0
+
+
+def batch_main(argv=None):
+    """kw-batch: the module report of many exports, plus a combined summary."""
+    parser = argparse.ArgumentParser(prog='kw-batch',
+                                     description="report on many Klocwork exports at once")
+    parser.add_argument('exports', nargs='+',
+                        help="export files, globs or directories of exports")
+    parser.add_argument('-o', '--output-dir', default='reports',
+                        help="directory of the reports and summary.xlsx (default: reports)")
+    parser.add_argument('-j', '--jobs', type=int,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--modules', help="module registry file (json, toml or yaml)")
+    parser.add_argument('--drilldown', action='append', metavar='MODULE',
+                        help="add a per-checker sheet for MODULE (default: %s)"
+                        % ", ".join(DEFAULT_DRILLDOWN))
+    parser.add_argument('--no-prefilter', dest='prefilter', action='store_false',
+                        help="keep the rows the registry's prefilter rules would drop")
+    parser.add_argument('--no-validate', dest='validate', action='store_false',
+                        help="do not check and repair the rows, nor quarantine the broken ones")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    _setup_logging(args.verbose)
+    exports = find_exports(args.exports)
+    if not exports:
+        parser.error("no exports found")
+    drilldown = args.drilldown if args.drilldown is not None else DEFAULT_DRILLDOWN
+    registry = load_registry(args.modules)
+    prefilter = load_prefilter(args.modules) if args.prefilter else None
+    validator = Validator(anchor=registry.anchor) if args.validate else None
+    cubes = run_batch(exports, args.output_dir, registry, prefilter, args.jobs, drilldown,
+                      args.verbose, validator)
+    return 0 if len(cubes) == len(exports) else 1
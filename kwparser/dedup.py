@@ -0,0 +1,61 @@
+"""
+Collapse issues reported once per build variant of the same source.
+
+sqlite3 and sqlite3-native, openssl and openssl-native, binutils-native
+and binutils-cross-arm... are analysed separately but share their sources,
+so Klocwork reports the same issue for each.  Issues are keyed on
+(canonical path, checker, function, message with line numbers masked); each
+group keeps one issue, preferably from a target recipe, with the list of
+variants it was reported for.  Identical issues within one variant are not
+merged with each other.
+"""
+
+import numpy as np
+
+from .issues import Column, mix_ranks, occurrence_ranks
+from .messages import mask_lines
+from .paths import canonical_path, is_host_variant, variant, work_dir_parts
+
+DEDUP_COLUMNS = ('canonical_path', 'checker', 'function', 'message_key')
+
+
+def _host_variant(path):
+    return is_host_variant(work_dir_parts(path)[2])
+
+
+def dedup(table, column='variants'):
+    """New table with one issue per key and a `column` listing the
+    variants ("<arch>/<recipe>") each issue was reported for.
+
+    The kept issues stay in report order.
+    """
+    table.map_column('file', 'canonical_path', canonical_path)
+    table.map_column('message', 'message_key', mask_lines)
+    variants = table.map_column('file', 'variant', variant)
+    host = table.map_column('file', 'host_variant', _host_variant)
+    keys = table.hash_rows(DEDUP_COLUMNS)
+    # repeats of an issue within one variant stay separate issues: the n-th
+    # copy in one variant only merges with the n-th copy in the others
+    keys = mix_ranks(keys, occurrence_ranks(table.hash_rows(DEDUP_COLUMNS + ('variant',))))
+
+    # per key: target recipes first, then report order
+    is_host = np.array([bool(value) for value in host.values], dtype=bool)[host.codes]
+    order = np.lexsort((np.arange(len(table)), is_host, keys))
+    ordered = keys[order]
+    first = np.r_[True, ordered[1:] != ordered[:-1]]
+    group = np.cumsum(first) - 1
+    keep = order[first]
+
+    # distinct (group, variant) pairs, in variant order within a group
+    pairs = np.unique(np.stack([group, variants.codes[order]], axis=1), axis=0)
+    names = [[] for i in range(len(keep))]
+    for g, code in pairs.tolist():
+        names[g].append(variants.values[code] or '')
+    labels = [", ".join(sorted(found)) for found in names]
+
+    report_order = np.argsort(keep, kind='stable')
+    deduped = table.take(keep[report_order])
+    listed = Column(column)
+    codes = np.array([listed.intern(labels[g]) for g in report_order.tolist()], dtype=np.int32)
+    deduped.add_column(column, listed.values, codes)
+    return deduped
@@ -0,0 +1,106 @@
+"""
+Compare two Klocwork runs: which issues are new, fixed or carried over.
+
+Issues are matched with a hash join on (file path without the workspace
+root, checker, function, message with line numbers masked).  Identical
+keys are paired up in order of appearance, so two copies of an issue
+against one are one carried over and one new.  Everything runs on the code
+arrays of the two IssueTables; the key parts are normalized once per
+distinct value.
+"""
+
+import logging
+
+import numpy as np
+from openpyxl import Workbook
+
+from .issues import IssueTable, mix_ranks, occurrence_ranks
+from .messages import mask_lines
+from .output import add_summary_table, table_ref
+from .paths import relative_path
+from .xlsxreader import REPORT_COLUMNS
+
+log = logging.getLogger(__name__)
+
+MATCH_COLUMNS = ('path_key', 'checker', 'function', 'message_key')
+
+DIFF_HEADER = ["module", "new", "fixed", "unchanged"]
+
+OTHER = "(other)"
+
+
+def match_keys(table):
+    """64-bit match key of every issue of `table`."""
+    table.map_column('file', 'path_key', relative_path)
+    table.map_column('message', 'message_key', mask_lines)
+    return table.hash_rows(MATCH_COLUMNS)
+
+
+class Diff(object):
+    """Row masks of the new and fixed issues between two tables."""
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        old_keys = match_keys(old)
+        new_keys = match_keys(new)
+        old_keys = mix_ranks(old_keys, occurrence_ranks(old_keys))
+        new_keys = mix_ranks(new_keys, occurrence_ranks(new_keys))
+        self.carried = np.isin(new_keys, old_keys)
+        self.added = ~self.carried
+        self.fixed = ~np.isin(old_keys, new_keys)
+
+    def module_rows(self, modules):
+        """[module, new, fixed, unchanged] per module, plus one for the
+        issues outside every module."""
+        labels = list(modules) + [OTHER]
+
+        def per_module(table, mask):
+            column = table['module']
+            position = dict((value, i) for i, value in enumerate(labels))
+            lookup = np.array([position.get(value, len(modules)) for value in column.values] or [0])
+            return np.bincount(lookup[column.codes[mask]], minlength=len(labels))
+
+        added = per_module(self.new, self.added)
+        fixed = per_module(self.old, self.fixed)
+        carried = per_module(self.new, self.carried)
+        return [[label, int(a), int(f), int(c)]
+                for label, a, f, c in zip(labels, added, fixed, carried)]
+
+
+def load_run(filename, registry):
+    table = IssueTable.from_workbook(filename)
+    table.map_column('file', 'module', registry.match)
+    return table
+
+
+def _write_issues(workbook, title, table, mask):
+    worksheet = workbook.create_sheet(title)
+    worksheet.append(("module",) + REPORT_COLUMNS)
+    for row in table.rows(('module',) + REPORT_COLUMNS, index=np.flatnonzero(mask)):
+        worksheet.append(row)
+
+
+def write_diff(filename, diff, modules):
+    wb = Workbook(write_only=True)
+    worksheet = wb.create_sheet("diff")
+    worksheet.append(DIFF_HEADER)
+    rows = diff.module_rows(modules)
+    for row in rows:
+        worksheet.append(row)
+    add_summary_table(worksheet, table_ref(len(DIFF_HEADER), len(rows) + 1), DIFF_HEADER,
+                      name="Diff")
+    _write_issues(wb, "new", diff.new, diff.added)
+    _write_issues(wb, "fixed", diff.old, diff.fixed)
+    wb.save(filename)
+
+
+def run_diff(old_file, new_file, output, registry):
+    old = load_run(old_file, registry)
+    new = load_run(new_file, registry)
+    diff = Diff(old, new)
+    log.info("%d new, %d fixed, %d unchanged issues",
+             diff.added.sum(), diff.fixed.sum(), diff.carried.sum())
+    write_diff(output, diff, registry.names)
+    log.info("%s: written", output)
+    return diff
@@ -0,0 +1,66 @@
+"""
+Top-N hotspots: the files, functions and checkers holding the most issues
+of one severity in each module.
+
+Counts are exact.  They are taken over the column codes, so the counters of
+a module are bounded by the number of distinct values, not by the rows, and
+the top N are picked with a partial sort (partition) rather than by
+sorting every value; values tied at the cut-off are taken in dictionary
+order.
+"""
+
+import numpy as np
+
+from .paths import relative_path
+
+HOTSPOT_COLUMNS = ('file', 'function', 'checker')
+
+HOTSPOT_HEADER = ["module", "rank", "issues"]
+
+
+def top_values(codes, values, count):
+    """[(value, issues)] of the `count` most frequent codes, busiest first
+    (ties in dictionary order)."""
+    counts = np.bincount(codes, minlength=len(values))
+    present = np.count_nonzero(counts)
+    count = min(count, present)
+    if not count:
+        return []
+    if count < len(counts):
+        # only the values tied with the count-th one need a full order:
+        # every value counted above it is in the top anyway
+        cut = -np.partition(-counts, count - 1)[count - 1]
+        candidates = np.flatnonzero(counts >= cut)
+    else:
+        candidates = np.arange(len(counts))
+    top = candidates[np.lexsort((candidates, -counts[candidates]))][:count]
+    return [(values[i], int(counts[i])) for i in top.tolist() if counts[i]]
+
+
+def hotspots(table, modules, count=10, severity='Critical', column='module',
+             names=HOTSPOT_COLUMNS):
+    """{name: {module: [(value, issues)]}} for each column of `names`,
+    counting the `severity` issues of every module of `modules`."""
+    selected = table.mask('severity', severity)
+    groups = dict((module, index) for module, index in table.groups(column))
+    result = dict((name, {}) for name in names)
+    for module in modules:
+        index = groups.get(module)
+        if index is None:
+            index = np.zeros(0, dtype=np.int64)
+        index = index[selected[index]]
+        for name in names:
+            col = table[name]
+            result[name][module] = top_values(col.codes[index], col.values, count)
+    return result
+
+
+def hotspot_rows(spots, name):
+    """[module, rank, issues, value] rows of one column of hotspots()."""
+    rows = []
+    for module, top in spots[name].items():
+        for rank, (value, issues) in enumerate(top, 1):
+            if name == 'file':
+                value = relative_path(value)
+            rows.append([module, rank, issues, value])
+    return rows
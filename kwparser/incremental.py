@@ -0,0 +1,159 @@
+"""
+Incremental re-analysis between runs.
+
+A cache directory holds one workbook per module plus ``index.sqlite``,
+which records for every module the content hashes of its rows, a digest of
+the whole set and its summary counts.  On the next run the rows of each
+module are hashed again; modules whose digest is unchanged keep their
+cached workbook and summary row, and only the others are rebuilt.  The
+digest also covers how the rows are laid out (e.g. sorted or in report
+order), so changing that rebuilds every workbook; a mere reshuffle of
+the export's rows does not.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from hashlib import blake2b
+
+import numpy as np
+
+from .output import write_module_workbook
+from .pivot import SEVERITIES, build_cube
+from .xlsxreader import REPORT_COLUMNS
+
+log = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS module (
+    name TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    issues INTEGER NOT NULL,
+    severities TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS row_hash (
+    module TEXT NOT NULL,
+    hash INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (module, hash)
+) WITHOUT ROWID;
+"""
+
+
+def digest(hashes, layout=''):
+    """Order-independent digest of a multiset of row hashes, written out
+    with `layout`."""
+    h = blake2b(np.sort(hashes).tobytes(), digest_size=16)
+    h.update(layout.encode('utf-8'))
+    return h.hexdigest()
+
+
+def _signed(hashes):
+    # sqlite integers are signed 64-bit
+    return hashes.view(np.int64)
+
+
+class IncrementalIndex(object):
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.db = sqlite3.connect(os.path.join(directory, INDEX_FILE))
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def workbook_path(self, module):
+        return os.path.join(self.directory, "%s.xlsx" % module)
+
+    def state(self, module):
+        """(digest, severity counts) recorded for `module`, or None."""
+        row = self.db.execute("SELECT digest, severities FROM module WHERE name = ?",
+                              (module,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def changes(self, module, hashes):
+        """Number of rows added and removed since the recorded run."""
+        old_hashes, old_counts = [], []
+        for value, count in self.db.execute(
+                "SELECT hash, count FROM row_hash WHERE module = ?", (module,)):
+            old_hashes.append(value)
+            old_counts.append(count)
+        old = dict(zip(old_hashes, old_counts))
+        values, counts = np.unique(_signed(hashes), return_counts=True)
+        new = dict(zip(values.tolist(), counts.tolist()))
+        added = sum(max(count - old.get(value, 0), 0) for value, count in new.items())
+        removed = sum(max(count - new.get(value, 0), 0) for value, count in old.items())
+        return added, removed
+
+    def record(self, module, hashes, severities, layout=''):
+        values, counts = np.unique(_signed(hashes), return_counts=True)
+        with self.db:
+            self.db.execute("DELETE FROM row_hash WHERE module = ?", (module,))
+            self.db.executemany("INSERT INTO row_hash (module, hash, count) VALUES (?, ?, ?)",
+                                ((module, value, count) for value, count
+                                 in zip(values.tolist(), counts.tolist())))
+            self.db.execute("INSERT OR REPLACE INTO module (name, digest, issues, severities) "
+                            "VALUES (?, ?, ?, ?)",
+                            (module, digest(hashes, layout), len(hashes),
+                             json.dumps(severities)))
+
+    def forget_others(self, modules):
+        """Drop the records of modules that are no longer registered."""
+        known = [name for (name,) in self.db.execute("SELECT name FROM module")]
+        with self.db:
+            for name in known:
+                if name not in modules:
+                    self.db.execute("DELETE FROM module WHERE name = ?", (name,))
+                    self.db.execute("DELETE FROM row_hash WHERE module = ?", (name,))
+
+
+def update(cache, table, modules, column='module', names=None, layout=''):
+    """Bring the cached module workbooks of `cache` up to date with `table`.
+
+    `layout` names how the rows of `table` are ordered; workbooks written
+    with another layout are rebuilt.  Returns the summary header and rows for all `modules` (cached rows for
+    the unchanged ones) and the list of modules that were rebuilt.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    groups = dict((module, index) for module, index in table.groups(column))
+    row_hashes = table.hash_rows(names or REPORT_COLUMNS)
+
+    changed = []
+    for module in modules:
+        hashes = row_hashes[groups.get(module, empty)]
+        state = cache.state(module)
+        if (state is not None and state[0] == digest(hashes, layout)
+                and os.path.exists(cache.workbook_path(module))):
+            continue
+        if state is None:
+            log.info("%s: new, %d issues", module, len(hashes))
+        else:
+            log.info("%s: %d added, %d removed", module, *cache.changes(module, hashes))
+        changed.append(module)
+
+    if changed:
+        cube = build_cube(table, changed, column)
+        for module in changed:
+            index = groups.get(module, empty)
+            write_module_workbook(cache.workbook_path(module), module,
+                                  table.rows(names, index=index), cube)
+            cache.record(module, row_hashes[index], cube.severity_counts(module), layout)
+    cache.forget_others(modules)
+    log.info("%d of %d modules rebuilt", len(changed), len(modules))
+
+    summaries = [(module, cache.state(module)[1]) for module in modules]
+    severities = list(SEVERITIES)
+    severities.extend(sorted(set(severity for module, counts in summaries for severity in counts
+                                 if severity not in SEVERITIES), key=str))
+    header = ["module"] + ["(%d)%s" % (i + 1, severity) for i, severity in enumerate(severities)]
+    rows = [[module] + [counts.get(severity, 0) for severity in severities]
+            for module, counts in summaries]
+    return header, rows, changed
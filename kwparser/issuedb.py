@@ -0,0 +1,167 @@
+"""
+SQLite database of the issues of a Klocwork export.
+
+Module, checker, severity and file names are stored once in lookup tables
+and the issue rows refer to them by id; the ids are the codes of the
+IssueTable columns, so loading is a bulk insert of the code arrays.  With
+the (module, severity) and (checker) indexes the report summaries are
+plain SQL, e.g.
+
+    SELECT module, severity, issues FROM module_severity;
+    SELECT COUNT(*) FROM issue JOIN module ON module.id = issue.module_id
+                              JOIN checker ON checker.id = issue.checker_id
+     WHERE module.name = 'awsdm' AND checker.name = 'ABV.STACK';
+"""
+
+import sqlite3
+
+from .pivot import SEVERITIES
+
+LOOKUPS = ('file', 'severity', 'checker', 'module')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS module (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS checker (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS severity (id INTEGER PRIMARY KEY, name TEXT UNIQUE, rank INTEGER);
+CREATE TABLE IF NOT EXISTS file (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS issue (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER REFERENCES file (id),
+    severity_id INTEGER REFERENCES severity (id),
+    checker_id INTEGER REFERENCES checker (id),
+    module_id INTEGER REFERENCES module (id),
+    function TEXT,
+    message TEXT,
+    state TEXT,
+    status TEXT,
+    owner TEXT
+);
+CREATE VIEW IF NOT EXISTS module_severity AS
+    SELECT module.name AS module, severity.name AS severity, COUNT(*) AS issues
+      FROM issue JOIN module ON module.id = issue.module_id
+                 JOIN severity ON severity.id = issue.severity_id
+     GROUP BY issue.module_id, issue.severity_id;
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS issue_module_severity ON issue (module_id, severity_id);
+CREATE INDEX IF NOT EXISTS issue_checker ON issue (checker_id);
+"""
+
+# severity counts of every module (get_all_module.py)
+SUMMARY_SQL = """
+SELECT module.name, severity.name, COUNT(*)
+  FROM issue JOIN module ON module.id = issue.module_id
+             JOIN severity ON severity.id = issue.severity_id
+ GROUP BY issue.module_id, issue.severity_id
+"""
+
+# checker x severity counts of one module (get_status_of_every_module.py)
+CHECKER_SQL = """
+SELECT checker.name, severity.name, COUNT(*)
+  FROM issue JOIN checker ON checker.id = issue.checker_id
+             JOIN severity ON severity.id = issue.severity_id
+ WHERE issue.module_id = (SELECT id FROM module WHERE name = ?)
+ GROUP BY issue.checker_id, issue.severity_id
+"""
+
+_TEXT_COLUMNS = ('function', 'message', 'state', 'status', 'owner')
+
+
+def _ids(codes):
+    # sqlite ids start at 1; code -1 (no value) stays NULL
+    return [code + 1 if code >= 0 else None for code in codes.tolist()]
+
+
+class IssueDB(object):
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.db = sqlite3.connect(filename)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def load(self, table, module_column='module', chunk=65536):
+        """Replace the content of the database with the issues of `table`."""
+        db = self.db
+        db.execute("PRAGMA synchronous = OFF")
+        with db:
+            db.execute("DROP INDEX IF EXISTS issue_module_severity")
+            db.execute("DROP INDEX IF EXISTS issue_checker")
+            db.execute("DELETE FROM issue")
+            columns = dict(zip(LOOKUPS, ('file', 'severity', 'checker', module_column)))
+            for lookup in LOOKUPS:
+                db.execute("DELETE FROM %s" % lookup)
+                values = table[columns[lookup]].values
+                if lookup == 'severity':
+                    db.executemany("INSERT INTO severity (id, name, rank) VALUES (?, ?, ?)",
+                                   ((i + 1, value, _rank(value)) for i, value in enumerate(values)))
+                else:
+                    db.executemany("INSERT INTO %s (id, name) VALUES (?, ?)" % lookup,
+                                   ((i + 1, value) for i, value in enumerate(values)))
+
+            ids = [table[columns[lookup]].codes for lookup in LOOKUPS]
+            for start in range(0, len(table), chunk):
+                window = slice(start, start + chunk)
+                values = [_ids(codes[window]) for codes in ids]
+                values.extend(table[name].decode(table[name].codes[window])
+                              for name in _TEXT_COLUMNS)
+                db.executemany("INSERT INTO issue (file_id, severity_id, checker_id, module_id, "
+                               "function, message, state, status, owner) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", zip(*values))
+            for statement in INDEXES.strip().split(';'):
+                if statement.strip():
+                    db.execute(statement)
+        db.execute("ANALYZE")
+
+    def severities(self):
+        """SEVERITIES followed by any other severity found, as in a Cube."""
+        found = [name for (name,) in self.db.execute(
+            "SELECT name FROM severity WHERE name IS NOT NULL ORDER BY rank, name")]
+        return list(SEVERITIES) + [name for name in found if name not in SEVERITIES]
+
+    def _pivot(self, sql, params, labels):
+        severities = self.severities()
+        position = dict((name, i) for i, name in enumerate(severities))
+        counts = dict((label, [0] * len(severities)) for label in labels or ())
+        for label, severity, count in self.db.execute(sql, params):
+            if label is None or severity is None:
+                continue
+            if labels is not None and label not in counts:
+                continue
+            counts.setdefault(label, [0] * len(severities))[position[severity]] += count
+        return severities, counts
+
+    def summary_rows(self, modules=None):
+        """[module, count per severity...] rows, like Cube.summary_rows();
+        `modules` fixes the rows (e.g. the registry order)."""
+        severities, counts = self._pivot(SUMMARY_SQL, (), modules)
+        order = modules if modules is not None else sorted(counts)
+        return [[module] + counts[module] for module in order]
+
+    def checker_rows(self, module):
+        """[checker, count per severity...] rows of one module, busiest first."""
+        severities, counts = self._pivot(CHECKER_SQL, (module,), None)
+        rows = [[checker] + values for checker, values in sorted(counts.items())]
+        rows.sort(key=lambda row: -sum(row[1:]))
+        return rows
+
+    def summary_header(self):
+        return ["module"] + ["(%d)%s" % (i + 1, severity)
+                             for i, severity in enumerate(self.severities())]
+
+
+def _rank(severity):
+    if severity in SEVERITIES:
+        return SEVERITIES.index(severity)
+    return len(SEVERITIES)
+
+
+def write_issue_db(filename, table, module_column='module'):
+    db = IssueDB(filename)
+    try:
+        db.load(table, module_column)
+    finally:
+        db.close()
@@ -0,0 +1,304 @@
+"""
+Columnar in-memory store for Klocwork issues.
+
+A report repeats very few distinct values (a handful of severities, states
+and owners, a few thousand files and messages), so every column is kept as
+an integer code array plus one interned dictionary of the distinct values.
+Filtering and grouping work on the code arrays with NumPy.
+"""
+
+from array import array
+from hashlib import blake2b
+
+import numpy as np
+from openpyxl.utils import get_column_letter
+
+from .xlsxreader import REPORT_COLUMNS, KlocworkWorkbook
+
+
+def value_hash(value):
+    """Stable 64-bit hash of a cell value (the same in every run, unlike hash())."""
+    digest = blake2b(repr(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def occurrence_ranks(keys):
+    """How many earlier entries of `keys` are equal to each entry (0 for the
+    first occurrence of a key, 1 for the second...)."""
+    order = np.argsort(keys, kind='stable')
+    ordered = keys[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    lengths = np.diff(np.r_[starts, len(keys)])
+    ranks = np.empty(len(keys), dtype=np.uint64)
+    ranks[order] = np.arange(len(keys), dtype=np.uint64) - np.repeat(starts, lengths).astype(np.uint64)
+    return ranks
+
+
+def mix_ranks(keys, ranks):
+    """Fold occurrence ranks into 64-bit keys, so repeated keys become
+    distinct and pair up one to one with the same repeats elsewhere."""
+    return keys ^ (ranks * np.uint64(0x9E3779B97F4A7C15))
+
+
+class Column(object):
+    """One dictionary-encoded column: `codes[i]` indexes `values`."""
+
+    __slots__ = ('name', 'values', 'codes', '_index')
+
+    def __init__(self, name, values=None, codes=None, index=None):
+        self.name = name
+        if index is None:
+            self.values = list(values or [])
+            self._index = {value: code for code, value in enumerate(self.values)}
+        else:
+            # share the dictionary of another column
+            self.values = values
+            self._index = index
+        if codes is None:
+            codes = np.zeros(0, dtype=np.int32)
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def code(self, value):
+        """Code of `value`, or -1 if it never occurs in the column."""
+        return self._index.get(value, -1)
+
+    def intern(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, codes=None):
+        values = self.values
+        if codes is None:
+            codes = self.codes
+        return [values[code] for code in codes.tolist()]
+
+
+class IssueTable(object):
+    """Integer-coded columns for a set of issues.
+
+    The 8 report columns are always present; extra columns (such as
+    ``module``) can be attached with add_column().
+    """
+
+    def __init__(self, columns):
+        self.columns = dict((column.name, column) for column in columns)
+        self.names = [column.name for column in columns]
+
+    @classmethod
+    def from_rows(cls, rows, names=REPORT_COLUMNS):
+        """Build a table from an iterable of row tuples in one pass."""
+        interned = [dict() for name in names]
+        values = [list() for name in names]
+        codes = [array('i') for name in names]
+        width = len(names)
+        for row in rows:
+            for i in range(width):
+                value = row[i]
+                index = interned[i]
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(values[i])
+                    values[i].append(value)
+                codes[i].append(code)
+        columns = [Column(name, values[i], np.frombuffer(codes[i], dtype=np.int32))
+                   for i, name in enumerate(names)]
+        return cls(columns)
+
+    @classmethod
+    def from_workbook(cls, filename, sheet=None, accept=None, validator=None):
+        """Read one sheet; `accept` is the column A pre-filter and
+        `validator` (a Validator) checks and repairs the rows.
+
+        Without a validator the reader drops the rows `accept` rejects
+        before building their cells.  With one, the line of a split row
+        has no path of its own to judge, so `accept` is applied by the
+        validator to the rows it has stitched back together.
+        """
+        with KlocworkWorkbook(filename) as wb:
+            if validator is None:
+                return cls.from_rows(wb.iter_rows(sheet, accept=accept))
+            return cls.from_rows(validator(wb.iter_rows(sheet, validator.width), accept))
+
+    @classmethod
+    def from_sheets(cls, workbook, sheets, column='module', copy_to=None):
+        """Read several sheets of a KlocworkWorkbook into one table.
+
+        Each row is labelled with its sheet name in `column`.  If `copy_to`
+        (a write-only Workbook) is given, every sheet is also streamed into
+        a new sheet of the same name on the way through, with all of its
+        cells and its column widths; the table only gets the report columns.
+        """
+        lengths = []
+        width = len(REPORT_COLUMNS)
+        padding = (None,) * width
+
+        def rows():
+            for sheet in sheets:
+                count = 0
+                if copy_to is None:
+                    for row in workbook.iter_rows(sheet):
+                        count += 1
+                        yield row
+                else:
+                    worksheet = copy_to.create_sheet(sheet)
+                    for index, size in workbook.column_widths(sheet).items():
+                        worksheet.column_dimensions[get_column_letter(index + 1)].width = size
+                    for row in workbook.iter_rows(sheet, width=None):
+                        worksheet.append(row)
+                        count += 1
+                        yield row[:width] if len(row) >= width else (row + padding)[:width]
+                lengths.append(count)
+
+        table = cls.from_rows(rows())
+        table.add_column(column, list(sheets),
+                         np.repeat(np.arange(len(lengths), dtype=np.int32), lengths))
+        return table
+
+    def __len__(self):
+        if not self.names:
+            return 0
+        return len(self.columns[self.names[0]])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def codes(self, name):
+        return self.columns[name].codes
+
+    def values(self, name):
+        return self.columns[name].values
+
+    def add_column(self, name, values, codes):
+        codes = np.asarray(codes, dtype=np.int32)
+        if len(codes) != len(self):
+            raise ValueError("column %s has %d rows, table has %d" % (name, len(codes), len(self)))
+        self.columns[name] = Column(name, values, codes)
+        if name not in self.names:
+            self.names.append(name)
+
+    def map_column(self, source, name, func):
+        """Derive column `name` by applying `func` to each distinct value of
+        `source`; `func` runs once per distinct value, not once per row.
+        """
+        column = self.columns[source]
+        derived = Column(name)
+        lookup = np.array([derived.intern(func(value)) for value in column.values],
+                          dtype=np.int32)
+        codes = lookup[column.codes] if len(lookup) else column.codes.copy()
+        self.add_column(name, derived.values, codes)
+        return self.columns[name]
+
+    def mask(self, name, value):
+        """Boolean row mask of `name == value`."""
+        return self.columns[name].codes == self.columns[name].code(value)
+
+    def isin(self, name, values):
+        column = self.columns[name]
+        wanted = [column.code(value) for value in values]
+        return np.isin(column.codes, [code for code in wanted if code >= 0])
+
+    def take(self, rows):
+        """New table holding the selected rows (a boolean mask or indices).
+
+        The dictionaries are shared with this table, so codes stay comparable.
+        """
+        columns = [self.columns[name] for name in self.names]
+        return IssueTable([Column(column.name, column.values, column.codes[rows], column._index)
+                           for column in columns])
+
+    def sort_ranks(self, name, order=None):
+        """Rank of every row's value of column `name` in sorted value order.
+
+        `order` lists values that come first, in that order; the others
+        follow sorted as strings (a column may mix numbers and strings),
+        with None last.
+        """
+        values = self.columns[name].values
+        first = dict((value, i) for i, value in enumerate(order or ()))
+        keys = sorted(range(len(values)), key=lambda code: (
+            first.get(values[code], len(first)), values[code] is None,
+            '' if values[code] is None else str(values[code])))
+        ranks = np.empty(len(values), dtype=np.int64)
+        ranks[keys] = np.arange(len(values))
+        return ranks[self.columns[name].codes] if len(values) else ranks
+
+    def argsort(self, *names, orders=None):
+        """Row order sorting on `names` (first name first); stable, so rows
+        with equal keys keep their report order.  `orders` maps column names
+        to the value order passed to sort_ranks()."""
+        orders = orders or {}
+        keys = [self.sort_ranks(name, orders.get(name)) for name in reversed(names)]
+        return np.lexsort(keys) if keys else np.arange(len(self))
+
+    def count_by(self, *names):
+        """Count rows per combination of codes of `names`.
+
+        Returns an ndarray shaped by the dictionary sizes of the columns.
+        """
+        shape = tuple(len(self.columns[name].values) for name in names)
+        if not shape or 0 in shape:
+            return np.zeros(shape, dtype=np.int64)
+        flat = np.ravel_multi_index([self.columns[name].codes for name in names], shape)
+        return np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+
+    def value_counts(self, name):
+        """Dict of value -> number of rows, for one column."""
+        column = self.columns[name]
+        counts = np.bincount(column.codes, minlength=len(column.values))
+        return dict(zip(column.values, counts.tolist()))
+
+    def groups(self, name):
+        """Row indices per value of column `name`, as (value, indices) pairs.
+
+        One stable argsort splits the whole table, so the rows of each group
+        keep their report order.
+        """
+        column = self.columns[name]
+        order = np.argsort(column.codes, kind='stable')
+        bounds = np.cumsum(np.bincount(column.codes, minlength=len(column.values)))
+        start = 0
+        for value, stop in zip(column.values, bounds.tolist()):
+            yield value, order[start:stop]
+            start = stop
+
+    def rows(self, names=None, index=None, chunk=65536):
+        """Yield the rows (all, or those at `index`) decoded back to tuples."""
+        if names is None:
+            names = REPORT_COLUMNS
+        columns = [self.columns[name] for name in names]
+        total = len(self) if index is None else len(index)
+        for start in range(0, total, chunk):
+            if index is None:
+                window = slice(start, start + chunk)
+            else:
+                window = index[start:start + chunk]
+            decoded = [column.decode(column.codes[window]) for column in columns]
+            for row in zip(*decoded):
+                yield row
+
+    def hash_rows(self, names=REPORT_COLUMNS):
+        """Stable 64-bit content hash of every row over the columns `names`.
+
+        Each distinct value is hashed once; the per-row hashes are then
+        combined from the code arrays with wrapping uint64 arithmetic.
+        """
+        hashes = np.zeros(len(self), dtype=np.uint64)
+        multiplier = np.uint64(1000003)
+        for name in names:
+            column = self.columns[name]
+            lookup = np.array([value_hash(value) for value in column.values] or [0],
+                              dtype=np.uint64)
+            hashes = (hashes * multiplier) ^ lookup[column.codes]
+        return hashes
+
+    def nbytes(self):
+        return sum(column.codes.nbytes for column in self.columns.values())
@@ -0,0 +1,40 @@
+"""
+Normalization of Klocwork issue messages (column E).
+"""
+
+import re
+
+# "at line 2267", "on line 11637", "lines 12 and 14", "lines 3, 4, 5"
+_LINE_NUMBERS = re.compile(r"\b(lines?) \d+(?:(?:, | and )\d+)*")
+
+
+# masking rules of message_template(), applied in order.  A run of numbers
+# with the separators between them ("2267", "0..300", "1.5", "12, 14 and
+# 15") is one number, and so is a hex constant; a leading '-' is kept, as
+# negative indexes are their own defect.  Digits inside a word (uint32_t,
+# 0xffu) belong to an identifier and are left alone.
+_TEMPLATE_RULES = [
+    (re.compile(r"'[^']*'"), "'*'"),
+    (re.compile(r"(?<!\w)(?:0[xX][0-9A-Fa-f]+|[0-9]+(?:(?:\.\.|, | and |[.,-])[0-9]+)*)(?!\w)"),
+     "#"),
+]
+
+
+def mask_lines(message):
+    """`message` with its line numbers replaced by '#', so an issue keeps
+    the same text when unrelated code above it moves."""
+    if not message:
+        return message
+    return _LINE_NUMBERS.sub(r"\1 #", message)
+
+
+def message_template(message):
+    """`message` with identifiers, line numbers and sizes masked, e.g.
+    "Pointer '*' returned from call to function '*' at line # may be NULL
+    and will be dereferenced at line #."  Issues of one checker with the
+    same template are the same kind of defect."""
+    if not message:
+        return message
+    for pattern, replacement in _TEMPLATE_RULES:
+        message = pattern.sub(replacement, message)
+    return message
@@ -0,0 +1,143 @@
+"""
+Per-stage timing of a report run.
+
+Every stage of a run is timed with Metrics.stage() and falls into one of
+four kinds: load (parsing the export), classify (modules, dedup, sorting),
+aggregate (counts, trees, clusters) and save (writing workbooks and
+databases).  A stage records its wall time, the rows it handled and the
+peak resident memory of the process when it ended; the whole run adds up
+the time spent in each kind.  Timing a stage is two clock reads and one
+getrusage() call, so runs are always instrumented.
+
+The fields are those of benchmarks/results.jsonl, so a metrics file can be
+read next to the benchmark results.
+"""
+
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+KINDS = ('load', 'classify', 'aggregate', 'save')
+
+METRICS_HEADER = ["stage", "kind", "seconds", "rows", "rows_per_sec", "peak_mb"]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it is
+    not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    if sys.platform != 'darwin':
+        peak *= 1024
+    return round(peak / 2.0 ** 20, 1)
+
+
+class Stage(object):
+
+    __slots__ = ('name', 'kind', 'seconds', 'rows', 'peak_mb')
+
+    def __init__(self, name, kind, rows=None):
+        if kind not in KINDS:
+            raise ValueError("unknown stage kind %r" % (kind,))
+        self.name = name
+        self.kind = kind
+        self.rows = rows
+        self.seconds = None
+        self.peak_mb = None
+
+    @property
+    def rows_per_sec(self):
+        if not self.rows or not self.seconds:
+            return None
+        return round(self.rows / self.seconds)
+
+    def record(self):
+        return {'stage': self.name, 'kind': self.kind, 'seconds': round(self.seconds, 4),
+                'rows': self.rows, 'rows_per_sec': self.rows_per_sec,
+                'peak_mb': self.peak_mb}
+
+
+class Metrics(object):
+
+    def __init__(self, source=None):
+        self.source = source
+        self.stages = []
+        self.rows = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, kind, rows=None):
+        """Time the body of the with statement as stage `name`; the rows it
+        handled can be set on the Stage it yields."""
+        stage = Stage(name, kind, rows)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - start
+            stage.peak_mb = peak_rss_mb()
+            self.stages.append(stage)
+            log.debug("%-10s %8.3fs %10s rows/s %8s MB", name, stage.seconds,
+                      stage.rows_per_sec, stage.peak_mb)
+
+    def split_off(self, stage, name, kind, seconds, rows=None):
+        """Move `seconds` of the finished `stage`, spent on work interleaved
+        with it (and timed on its own), to a new stage `name`."""
+        stage.seconds -= seconds
+        part = Stage(name, kind, rows)
+        part.seconds = seconds
+        part.peak_mb = stage.peak_mb
+        self.stages.append(part)
+        return part
+
+    def wall_seconds(self):
+        return time.perf_counter() - self._start
+
+    def kind_seconds(self):
+        """{kind: seconds} over all stages, for every kind."""
+        seconds = dict((kind, 0.0) for kind in KINDS)
+        for stage in self.stages:
+            seconds[stage.kind] += stage.seconds
+        return seconds
+
+    def summary(self):
+        wall = self.wall_seconds()
+        return {
+            'source': self.source,
+            'wall_seconds': round(wall, 4),
+            'rows': self.rows,
+            'rows_per_sec': round(self.rows / wall) if self.rows and wall else None,
+            'peak_mb': peak_rss_mb(),
+            'kinds': dict((kind, round(seconds, 4))
+                          for kind, seconds in self.kind_seconds().items()),
+            'stages': [stage.record() for stage in self.stages],
+        }
+
+    def rows_table(self):
+        """[stage, kind, seconds, rows, rows_per_sec, peak_mb] rows of the
+        stages so far, for a metrics sheet."""
+        records = [stage.record() for stage in self.stages]
+        return [[record[field] for field in METRICS_HEADER] for record in records]
+
+    def write(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.summary(), f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    def report(self):
+        summary = self.summary()
+        log.info("%.2fs, %s rows/s, peak %s MB (%s)", summary['wall_seconds'],
+                 summary['rows_per_sec'], summary['peak_mb'],
+                 ", ".join("%s %.2fs" % item for item in self.kind_seconds().items()))
+        return summary
@@ -0,0 +1,290 @@
+"""
+Helpers for writing the report workbooks.
+"""
+
+import re
+import warnings
+
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, NamedStyle
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableStyleInfo
+
+from .hotspots import HOTSPOT_HEADER, hotspot_rows
+from .metrics import METRICS_HEADER
+from .xlsxreader import REPORT_COLUMNS
+
+SUMMARY_HEADER = ["module", "(1)Critical", "(2)Error", "(3)Warning", "(4)Review"]
+
+ISSUE_STYLE = "Klocwork issue"
+
+
+def issue_style(workbook):
+    """Register the named style of the issue cells on `workbook` (once) and
+    return its name.  Issue cells are text, top-aligned."""
+    if ISSUE_STYLE not in workbook.named_styles:
+        workbook.add_named_style(NamedStyle(name=ISSUE_STYLE, number_format='@',
+                                            alignment=Alignment(vertical='top')))
+    return ISSUE_STYLE
+
+
+class StyledRows(object):
+    """Appends rows to a write-only worksheet with every cell in one named
+    style.
+
+    A write-only worksheet serializes a row as soon as it is appended, so one
+    styled WriteOnlyCell per column is created up front and refilled for
+    every row: the style is resolved once, not once per cell.
+    """
+
+    def __init__(self, worksheet, style, width=len(REPORT_COLUMNS)):
+        self.worksheet = worksheet
+        self.style = style
+        self.cells = []
+        self._grow(width)
+
+    def _grow(self, width):
+        while len(self.cells) < width:
+            cell = WriteOnlyCell(self.worksheet)
+            cell.style = self.style
+            self.cells.append(cell)
+
+    def append(self, row):
+        cells = self.cells
+        if len(row) > len(cells):
+            # rows read at their full width
+            self._grow(len(row))
+        for cell, value in zip(cells, row):
+            cell.value = value
+        self.worksheet.append(cells[:len(row)])
+
+
+TOTAL = "total"
+
+
+# characters Excel does not take in a table name, and names it would read
+# as a cell reference (A1, R1C1, R, C)
+_NOT_IN_TABLE_NAME = re.compile(r'[^\w.]')
+_CELL_LIKE = re.compile(r'[A-Za-z]{1,3}[0-9]+$|[RrCc][0-9]*$|[Rr][0-9]*[Cc][0-9]*$')
+
+
+def table_name(workbook, name):
+    """`name` (e.g. built from a module name such as oem-gui) made a valid
+    Excel table name, unique in `workbook`.
+
+    Characters other than letters, digits, '_' and '.' become '_', and a
+    name starting with a digit or '.', or looking like a cell reference,
+    gets a leading '_'.  Table names are unique regardless of case, so a
+    taken name gets a _2, _3... suffix.
+    """
+    name = _NOT_IN_TABLE_NAME.sub('_', name) or '_'
+    if not (name[0].isalpha() or name[0] == '_') or _CELL_LIKE.match(name):
+        name = '_' + name
+    taken = set(table.lower() for worksheet in workbook.worksheets
+                for table in worksheet.tables)
+    unique = name
+    suffix = 2
+    while unique.lower() in taken:
+        unique = "%s_%d" % (name, suffix)
+        suffix += 1
+    return unique
+
+
+def add_summary_table(worksheet, ref, header=SUMMARY_HEADER, name="Table1", totals=False):
+    """Add the styled summary table covering `ref` to `worksheet`.
+
+    Write-only worksheets cannot read the heading cells back, so the table
+    columns are named from `header` here.  With `totals`, the last row of
+    `ref` is the table's totals row (see totals_row()).  `name` is made a
+    valid table name first (see table_name()).
+    """
+    tab = Table(displayName=table_name(worksheet.parent, name), ref=ref)
+    tab._initialise_columns()
+    for column, heading in zip(tab.tableColumns, header):
+        column.name = heading
+    if totals:
+        tab.totalsRowCount = 1
+        tab.tableColumns[0].totalsRowLabel = TOTAL
+        for column in tab.tableColumns[1:]:
+            column.totalsRowFunction = "sum"
+
+    # Add a default style with striped rows and banded columns
+    #style = TableStyleInfo(name="TableStyleMedium9", showFirstColumn=False,
+    #                       showLastColumn=False, showRowStripes=True, showColumnStripes=True)
+
+    style = TableStyleInfo(name="TableStyleMedium4", showFirstColumn=False,
+                           showLastColumn=True, showRowStripes=False, showColumnStripes=True)
+
+    tab.tableStyleInfo = style
+    with warnings.catch_warnings():
+        # openpyxl always warns about the columns in write-only mode
+        warnings.simplefilter('ignore', UserWarning)
+        worksheet.add_table(tab)
+    return tab
+
+
+def link_cell(worksheet, value, target):
+    """Write-only cell showing `value` and linking to `target` (e.g. the
+    relative path of another workbook)."""
+    cell = WriteOnlyCell(worksheet, value)
+    cell.hyperlink = target
+    cell.style = "Hyperlink"
+    return cell
+
+
+def table_ref(width, height):
+    """Reference of a table `width` columns wide and `height` rows high,
+    anchored at A1."""
+    return "A1:%s%d" % (get_column_letter(width), height)
+
+
+def totals_row(width, first, last):
+    """Totals row of a table `width` columns wide whose data rows are
+    `first`..`last`: the label, then the subtotal of every other column."""
+    return [TOTAL] + ["=SUBTOTAL(109,%s%d:%s%d)" % (letter, first, letter, last)
+                      for letter in map(get_column_letter, range(2, width + 1))]
+
+
+def write_table(worksheet, header, rows, name, totals=False):
+    """Append `header` and `rows` to `worksheet` (and a totals row) and add
+    a table sized to what was written.  No table is added without rows."""
+    worksheet.append(header)
+    count = 0
+    for row in rows:
+        worksheet.append(row)
+        count += 1
+    if not count:
+        return None
+    height = count + 1
+    if totals:
+        worksheet.append(totals_row(len(header), 2, height))
+        height += 1
+    return add_summary_table(worksheet, table_ref(len(header), height), header, name=name,
+                             totals=totals)
+
+
+def write_summary_sheet(workbook, header, rows, title="summary", worksheet=None, totals=False):
+    """Per-module severity counts, as a table sized to the rows written.
+
+    Cells that need the worksheet (e.g. link_cell()) are created before the
+    rows are written, so an existing `worksheet` may be passed in.
+    """
+    if worksheet is None:
+        worksheet = workbook.create_sheet(title)
+    write_table(worksheet, header, rows, "Summary", totals)
+    return worksheet
+
+
+def write_checker_sheet(workbook, cube, module, title=None, totals=False):
+    """Drill-down of one module: counts per checker and severity."""
+    if title is None:
+        title = "%s_checkers" % module
+    worksheet = workbook.create_sheet(title[:31])
+    header = ["checker"] + cube.summary_header()[1:]
+    write_table(worksheet, header, cube.checker_rows(module), "%s_checkers" % module, totals)
+    return worksheet
+
+
+def write_checker_breakdown(workbook, cube, title="checkers", totals=True):
+    """Issues per checker (rows) and module (columns), busiest checker first."""
+    worksheet = workbook.create_sheet(title[:31])
+    header = ["checker"] + cube.modules + [TOTAL]
+    write_table(worksheet, header, cube.checker_module_rows(), "Checkers", totals)
+    return worksheet
+
+
+def write_directory_sheet(workbook, tree, module, path, title=None):
+    """Drill-down of one module by directory and file, from a DirectoryTree."""
+    if title is None:
+        title = "%s_dirs" % module
+    worksheet = workbook.create_sheet(title[:31])
+    write_table(worksheet, ["path", "issues"], tree.rows(path), "%s_dirs" % module)
+    return worksheet
+
+
+def write_cluster_sheet(workbook, clusters, title="clusters"):
+    """Issue clusters (checker, message template), busiest first, with
+    their counts per module."""
+    worksheet = workbook.create_sheet(title)
+    write_table(worksheet, clusters.header(), clusters.rows(), "Clusters")
+    return worksheet
+
+
+def write_trend_sheets(workbook, store, modules, severity="Critical"):
+    """Per-build `severity` counts of each module, and the (module, checker)
+    pairs that moved most since the previous build, from a TrendStore."""
+    worksheet = workbook.create_sheet("trend")
+    header, rows = store.severity_trend(severity, modules)
+    write_table(worksheet, header, rows, "Trend")
+
+    worksheet = workbook.create_sheet("movers")
+    write_table(worksheet, ["module", "checker", "previous", "current", "change"],
+                store.top_movers(), "Movers")
+
+
+def write_hotspot_sheets(workbook, spots):
+    """One top_<column>s sheet per column of a hotspots() result: the
+    busiest values of each module, ranked."""
+    for name in spots:
+        worksheet = workbook.create_sheet("top_%ss" % name)
+        write_table(worksheet, HOTSPOT_HEADER + [name], hotspot_rows(spots, name),
+                    "top_%ss" % name)
+
+
+def write_quarantine_sheet(workbook, rows, title="quarantine"):
+    """Rows a Validator could not repair, each with the reason and its
+    cells as read (cells past column H follow the table)."""
+    worksheet = workbook.create_sheet(title)
+    write_table(worksheet, ["reason"] + list(REPORT_COLUMNS), rows, "Quarantine")
+    return worksheet
+
+
+def write_metrics_sheet(workbook, metrics, title="metrics"):
+    """Time, rows/s and peak memory of every stage timed on `metrics` (a
+    Metrics) so far."""
+    worksheet = workbook.create_sheet(title)
+    write_table(worksheet, METRICS_HEADER, metrics.rows_table(), "Metrics")
+    return worksheet
+
+
+def write_module_sheets(workbook, table, modules, column='module', names=None):
+    """One sheet per module holding its issue rows, in table order (sorted
+    by severity, checker and file in kw-report, unless --report-order).
+
+    `names` are the columns written (default: the 8 report columns).
+    """
+    wanted = set(modules)
+    groups = dict((module, index) for module, index in table.groups(column)
+                  if module in wanted)
+    for module in modules:
+        worksheet = workbook.create_sheet(module)
+        index = groups.get(module)
+        if index is not None:
+            for row in table.rows(names, index=index):
+                worksheet.append(row)
+
+
+def write_module_workbook(filename, module, rows, cube, checker_title="checkers"):
+    """Workbook of one module: its issue rows and its checker drill-down."""
+    wb = Workbook(write_only=True)
+    worksheet = wb.create_sheet(module)
+    for row in rows:
+        worksheet.append(row)
+    write_checker_sheet(wb, cube, module, title=checker_title)
+    wb.save(filename)
+
+
+def write_severity_sheets(workbook, table, modules, severities, column='module', names=None):
+    """One sheet per severity with the issues of `modules`, module first,
+    in table order."""
+    if names is None:
+        names = REPORT_COLUMNS
+    in_modules = table.isin(column, modules)
+    for severity in severities:
+        worksheet = workbook.create_sheet(str(severity)[:31])
+        worksheet.append((column,) + tuple(names))
+        index = np.flatnonzero(in_modules & table.mask('severity', severity))
+        for row in table.rows((column,) + tuple(names), index=index):
+            worksheet.append(row)
@@ -0,0 +1,119 @@
+"""
+Parse and write workbooks across a process pool.
+
+For reading, every worker opens the workbook once (so the shared string
+table is parsed once per process, not once per sheet) and parses chunks of
+rows: large sheets are cut on row boundaries (see KlocworkWorkbook.chunks())
+so that one big sheet is spread over the workers too.  A worker counts its
+chunk into a partial cube, and, for a caller copying the sheets (such as
+get_all_module.py), also serializes the rows of the chunk, every cell of
+them, to a file with sheetxml; the caller splices the files into its saved
+workbook.  The parent only cuts the sheets, sums the partial cubes with
+merge_cubes() and copies the files into the zip.
+
+For writing, each module goes to its own workbook (a shard), and the xml
+serialization and compression of the shards run concurrently.
+"""
+
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
+
+from .issues import IssueTable
+from .output import write_module_workbook
+from .pivot import build_cube
+from .sheetxml import write_rows
+from .xlsxreader import CHUNK_BYTES, REPORT_COLUMNS, KlocworkWorkbook
+
+_workbook = None
+
+
+def _open_workbook(filename):
+    global _workbook
+    _workbook = KlocworkWorkbook(filename)
+    _workbook.shared_strings()
+
+
+def read_chunk(workbook, chunk, directory=None, column='module'):
+    """Count one Chunk of a sheet into a cube, its rows labelled with the
+    sheet name in `column`.
+
+    With a `directory`, the rows (all of their cells) are also serialized
+    to a new file there.  Returns (chunk, cube, rows, file).
+    """
+    width = len(REPORT_COLUMNS)
+    padding = (None,) * width
+    path = None
+    if directory is None:
+        rows = workbook.iter_chunk(chunk)
+    else:
+        fd, path = tempfile.mkstemp('.xml', dir=directory)
+        f = open(fd, 'w', encoding='utf-8')
+        rows = write_rows(f, workbook.iter_chunk(chunk, width=None))
+    try:
+        table = IssueTable.from_rows(row if len(row) == width else (row + padding)[:width]
+                                     for number, row in rows)
+    finally:
+        if path is not None:
+            f.close()
+    table.add_column(column, [chunk.sheet], np.zeros(len(table), dtype=np.int32))
+    return chunk, build_cube(table, [chunk.sheet], column), len(table), path
+
+
+def _read_chunk(task):
+    return read_chunk(_workbook, *task)
+
+
+def read_sheets(filename, sheets, jobs=1, directory=None, size=CHUNK_BYTES):
+    """Yield (chunk, cube, rows, file) for the chunks of `sheets`, in order,
+    read by read_chunk() in `jobs` worker processes (in this one for a
+    single job).  Every sheet has at least one chunk."""
+    with KlocworkWorkbook(filename) as workbook:
+        chunks = [chunk for sheet in sheets for chunk in workbook.chunks(sheet, size)]
+        if jobs <= 1:
+            for chunk in chunks:
+                yield read_chunk(workbook, chunk, directory)
+            return
+    with ProcessPoolExecutor(jobs, initializer=_open_workbook, initargs=(filename,)) as pool:
+        for result in pool.map(_read_chunk, [(chunk, directory) for chunk in chunks]):
+            yield result
+
+
+def shard_path(directory, module):
+    return os.path.join(directory, "%s.xlsx" % module)
+
+
+def _write_shard(filename, module, rows, cube):
+    write_module_workbook(filename, module, rows, cube)
+    return module
+
+
+def write_shards(directory, table, cube, names=None, jobs=None, column='module'):
+    """Write every module of `cube` to `<directory>/<module>.xlsx`, with
+    `jobs` worker processes (default: one per CPU).
+
+    Each worker gets the decoded rows of one module and its slice of the
+    cube; at most two shards per worker are in flight, so the parent does
+    not hold the rows of every module at once.  Yields the modules as their
+    shards are written.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    empty = np.zeros(0, dtype=np.int64)
+    groups = dict((module, index) for module, index in table.groups(column))
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(jobs) as pool:
+        limit = 2 * jobs
+        pending = set()
+        for module in cube.modules:
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            rows = list(table.rows(names, index=groups.get(module, empty)))
+            pending.add(pool.submit(_write_shard, shard_path(directory, module), module,
+                                    rows, cube.select([module])))
+        for future in as_completed(pending):
+            yield future.result()
@@ -0,0 +1,115 @@
+"""
+Helpers for the file paths in column A of a Klocwork export.
+"""
+
+from collections import namedtuple
+
+from .registry import DEFAULT_ANCHOR
+
+BuildPath = namedtuple('BuildPath', 'root workdir arch recipe version source')
+
+
+def relative_path(path, anchor=DEFAULT_ANCHOR):
+    """`path` without the workspace root, i.e. starting at `anchor`, so the
+    same file compares equal across build machines and workspaces."""
+    if not path or not isinstance(path, str):
+        return path
+    pos = path.find(anchor)
+    if pos < 0:
+        return path
+    return path[pos:]
+
+
+def work_dir_parts(path, anchor=DEFAULT_ANCHOR):
+    """(workdir, arch, recipe) of a path below the build tmpdir.
+
+    ``.../tmp-glibc/work/<arch>/<recipe>/...`` gives all three;
+    ``.../tmp-glibc/work-shared/<recipe>/...`` has no arch.  Paths outside
+    the tmpdir give (None, None, None).
+    """
+    if not path or not isinstance(path, str):
+        return None, None, None
+    pos = path.find(anchor)
+    if pos < 0:
+        return None, None, None
+    segments = path[pos + len(anchor):].split('/', 3)
+    workdir = segments[0]
+    if workdir == 'work':
+        arch = segments[1] if len(segments) > 2 else None
+        recipe = segments[2] if len(segments) > 3 else None
+        return workdir, arch, recipe
+    recipe = segments[1] if len(segments) > 2 else None
+    return workdir, None, recipe
+
+
+# recipe name suffixes of the host builds of a target recipe
+_VARIANT_SUFFIXES = ('-native', '-cross-', '-crosssdk-')
+
+
+def base_recipe(recipe):
+    """`recipe` without its -native / -cross-<arch> variant suffix."""
+    for suffix in _VARIANT_SUFFIXES:
+        pos = recipe.find(suffix)
+        if pos > 0:
+            return recipe[:pos]
+    if recipe.endswith('-cross'):
+        return recipe[:-len('-cross')]
+    return recipe
+
+
+def is_host_variant(recipe):
+    return recipe is not None and base_recipe(recipe) != recipe
+
+
+def canonical_path(path, anchor=DEFAULT_ANCHOR):
+    """Path of a source file independent of the build variant.
+
+    The workspace root, the arch directory, the -native/-cross-* suffix and
+    the version directory are dropped, so ``work/x86_64-linux/
+    sqlite3-native/3.8.10.2-r0/sqlite-autoconf-3081002/sqlite3.c`` and
+    ``work/armv7a-.../sqlite3/3.8.10.2-r0/sqlite-autoconf-3081002/sqlite3.c``
+    both become ``sqlite3/sqlite-autoconf-3081002/sqlite3.c``.
+    """
+    if not path or not isinstance(path, str):
+        return path
+    pos = path.find(anchor)
+    if pos < 0:
+        return path
+    segments = path[pos + len(anchor):].split('/', 4)
+    if segments[0] == 'work' and len(segments) == 5:
+        return base_recipe(segments[2]) + '/' + segments[4]
+    if segments[0] == 'work-shared':
+        return '/'.join(segments[1:])
+    return path[pos:]
+
+
+def variant(path, anchor=DEFAULT_ANCHOR):
+    """'<arch>/<recipe>' build variant of a path (the recipe alone for
+    work-shared), or None outside the build tmpdir."""
+    workdir, arch, recipe = work_dir_parts(path, anchor)
+    if recipe is None:
+        return None
+    if arch is None:
+        return recipe
+    return arch + '/' + recipe
+
+
+def split_path(path, anchor=DEFAULT_ANCHOR):
+    """Split `path` into a BuildPath.
+
+    ``<root>poky/build/tmp-glibc/work/<arch>/<recipe>/<version>/<source>``
+    fills every field; work-shared paths have no arch and no version, and
+    paths outside the tmpdir only have a source.
+    """
+    if not path or not isinstance(path, str):
+        return BuildPath(None, None, None, None, None, path)
+    pos = path.find(anchor)
+    if pos < 0:
+        return BuildPath(None, None, None, None, None, path)
+    root = path[:pos + len(anchor)]
+    segments = path[pos + len(anchor):].split('/', 4)
+    if segments[0] == 'work' and len(segments) == 5:
+        return BuildPath(root, 'work', segments[1], segments[2], segments[3], segments[4])
+    if segments[0] == 'work-shared' and len(segments) > 2:
+        return BuildPath(root, 'work-shared', None, segments[1], None, '/'.join(segments[2:]))
+    return BuildPath(root, None, None, None, None, '/'.join(segments))
@@ -0,0 +1,260 @@
+"""
+End-to-end report pipeline.
+
+The raw Klocwork export is parsed once into an IssueTable that stays in
+memory; the module sheets, the module summary and the per-module checker
+drill-downs are all produced from it and saved in a single write, with no
+intermediate xlsx files between the stages.
+"""
+
+import logging
+import os
+
+from openpyxl import Workbook
+
+from . import incremental
+from .charts import write_dashboard
+from .clusters import cluster
+from .dedup import dedup
+from .hotspots import hotspots
+from .issuedb import write_issue_db
+from .issues import IssueTable
+from .metrics import Metrics
+from .output import (link_cell, write_checker_sheet, write_cluster_sheet,
+                     write_directory_sheet, write_hotspot_sheets, write_metrics_sheet,
+                     write_module_sheets, write_quarantine_sheet, write_severity_sheets, write_summary_sheet,
+                     write_trend_sheets)
+from .parallel import shard_path, write_shards
+from .pivot import SEVERITIES, build_cube
+from .tree import DirectoryTree
+from .trend import TrendStore
+from .xlsxreader import REPORT_COLUMNS
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DRILLDOWN = ('awsdm',)
+
+
+def load_issues(filename, registry, sheet=None, prefilter=None, validator=None, metrics=None):
+    """Parse a Klocwork export and label every issue with its module.
+
+    Rows are checked and repaired by `validator` (a Validator), which
+    holds on to the rows it cannot repair, and the rows rejected by
+    `prefilter` (a PreFilter) are dropped while parsing.  The parse and
+    module stages are timed on `metrics`.
+    """
+    if metrics is None:
+        metrics = Metrics(filename)
+    with metrics.stage('parse', 'load') as stage:
+        table = IssueTable.from_workbook(filename, sheet, accept=prefilter or None,
+                                         validator=validator)
+        # throughput is over the rows read, dropped and quarantined ones too
+        stage.rows = len(table)
+        if prefilter:
+            stage.rows += sum(prefilter.dropped.values())
+        if validator is not None:
+            stage.rows += len(validator.quarantined)
+        metrics.rows = stage.rows
+    if prefilter:
+        prefilter.report()
+    if validator is not None:
+        validator.report()
+    with metrics.stage('modules', 'classify', len(table)):
+        table.map_column('file', 'module', registry.match)
+    return table
+
+
+def sort_issues(table):
+    """`table` ordered by severity (Critical first), checker and file."""
+    return table.take(table.argsort('severity', 'checker', 'file',
+                                    orders={'severity': SEVERITIES}))
+
+
+def prepare(table, deduplicate=False, sort=True, metrics=None):
+    """Optional clean-up stages between parsing and reporting; returns the
+    table and the columns to write for each issue."""
+    if metrics is None:
+        metrics = Metrics()
+    names = REPORT_COLUMNS
+    if deduplicate:
+        before = len(table)
+        with metrics.stage('dedup', 'classify', before):
+            table = dedup(table)
+        names = REPORT_COLUMNS + ('variants',)
+        log.info("dedup: %d issues collapsed into %d", before, len(table))
+    if sort:
+        with metrics.stage('sort', 'classify', len(table)):
+            table = sort_issues(table)
+    return table, names
+
+
+def write_report(filename, table, cube, drilldown=DEFAULT_DRILLDOWN, names=None, tree=None,
+                 registry=None, clusters=None, trend=None, spots=None, severity_sheets=False,
+                 charts=False, quarantine=None, metrics=None):
+    """Summary, drill-downs and module sheets in one workbook.  With a
+    DirectoryTree, each drill-down module also gets a per-directory sheet;
+    with Clusters, a clusters sheet follows the summary, with a TrendStore,
+    the trend and movers sheets, and with hotspots, the top-N sheets.
+    `severity_sheets` adds one sheet per severity after the module sheets,
+    and `charts` a dashboard of per-module charts after the summary.  Rows
+    in `quarantine` go to a sheet of their own, and the stages timed on
+    `metrics` so far (a Metrics) to a last, metrics sheet."""
+    wb = Workbook(write_only=True)
+    write_summary_sheet(wb, cube.summary_header(), cube.summary_rows())
+    if charts:
+        builds = len(trend.builds()) if trend is not None else 0
+        write_dashboard(wb, cube.modules, cube.severities, trend="trend" if builds else None,
+                        builds=builds)
+    if trend is not None:
+        write_trend_sheets(wb, trend, cube.modules)
+    if clusters is not None:
+        write_cluster_sheet(wb, clusters)
+    if spots is not None:
+        write_hotspot_sheets(wb, spots)
+    paths = dict((module.name, module.path) for module in registry or ())
+    for module in drilldown:
+        if module not in cube.modules:
+            log.warning("no module %s to drill down into", module)
+            continue
+        write_checker_sheet(wb, cube, module)
+        if tree is not None and module in paths:
+            write_directory_sheet(wb, tree, module, paths[module])
+    write_module_sheets(wb, table, cube.modules, names=names)
+    if severity_sheets:
+        write_severity_sheets(wb, table, cube.modules, cube.severities, names=names)
+    if quarantine:
+        write_quarantine_sheet(wb, quarantine)
+    if metrics is not None:
+        write_metrics_sheet(wb, metrics)
+    wb.save(filename)
+
+
+def run_report(source, output, registry, drilldown=DEFAULT_DRILLDOWN, prefilter=None,
+               deduplicate=False, directories=False, clustering=False, database=None,
+               trend_dir=None, build=None, top=None, sort=True, severity_sheets=False,
+               charts=False, validator=None, metrics=None, metrics_sheet=False):
+    """Split, summarize and drill down `source` into the workbook `output`,
+    and optionally load the issues into the SQLite file `database`.
+
+    With `trend_dir`, the counts are appended to the trend store there as
+    `build` and the report gets the trend.  A `build` already in the store
+    is refused before `source` is read; by default the build is named after
+    `source`, with a -2, -3... suffix when that name is taken.
+    With `top`, the report lists the `top` files, functions and checkers
+    with the most Critical issues in each module.  Issues are written sorted
+    by severity, checker and file unless `sort` is false; `severity_sheets`
+    adds one sheet per severity with the issues of all modules, and `charts`
+    a dashboard of per-module charts.  With a `validator`, the rows it
+    could not repair are written to a quarantine sheet.
+
+    Every stage is timed on `metrics` (a Metrics); `metrics_sheet` adds
+    their timings to the report.
+    """
+    if metrics is None:
+        metrics = Metrics(source)
+    trend = None
+    if trend_dir:
+        trend = TrendStore(trend_dir)
+        if build is None:
+            build = trend.unique_build(os.path.splitext(os.path.basename(source))[0])
+        elif build in trend:
+            raise ValueError("build %s is already in the trend store %s" % (build, trend_dir))
+    table = load_issues(source, registry, prefilter=prefilter, validator=validator,
+                        metrics=metrics)
+    log.info("%s: %d issues", source, len(table))
+    table, names = prepare(table, deduplicate, sort, metrics)
+    if database:
+        with metrics.stage('database', 'save', len(table)):
+            write_issue_db(database, table)
+        log.info("%s: written", database)
+    with metrics.stage('cube', 'aggregate', len(table)):
+        cube = build_cube(table, registry.names)
+    tree = None
+    if directories:
+        with metrics.stage('dirs', 'aggregate', len(table)):
+            tree = DirectoryTree.from_table(table, anchor=registry.anchor)
+    clusters = None
+    if clustering:
+        with metrics.stage('clusters', 'aggregate', len(table)):
+            clusters = cluster(table, registry.names)
+        log.info("%d issues in %d clusters", len(table), len(clusters))
+    if trend is not None:
+        with metrics.stage('trend', 'aggregate'):
+            trend.append(build, cube)
+        log.info("%s: build %s recorded, %d builds", trend_dir, build, len(trend.builds()))
+    spots = None
+    if top:
+        with metrics.stage('hotspots', 'aggregate', len(table)):
+            spots = hotspots(table, registry.names, top)
+    with metrics.stage('report', 'save', len(table)):
+        write_report(output, table, cube, drilldown, names, tree, registry, clusters, trend,
+                     spots, severity_sheets, charts,
+                     validator.quarantined if validator else None,
+                     metrics if metrics_sheet else None)
+    log.info("%s: written", output)
+    return table, cube
+
+
+def run_incremental(source, output, registry, cache_dir, prefilter=None, deduplicate=False,
+                    sort=True, validator=None, metrics=None):
+    """Like run_report(), but keep one workbook per module in `cache_dir`
+    and rebuild only the modules whose rows changed since the last run.
+
+    `output` gets the summary of all modules (and the quarantined rows).
+    """
+    if metrics is None:
+        metrics = Metrics(source)
+    table = load_issues(source, registry, prefilter=prefilter, validator=validator,
+                        metrics=metrics)
+    log.info("%s: %d issues", source, len(table))
+    table, names = prepare(table, deduplicate, sort, metrics)
+    with metrics.stage('incremental', 'save', len(table)):
+        cache = incremental.IncrementalIndex(cache_dir)
+        try:
+            header, rows, changed = incremental.update(cache, table, registry.names,
+                                                       names=names,
+                                                       layout='sorted' if sort else '')
+        finally:
+            cache.close()
+    with metrics.stage('summary', 'save'):
+        wb = Workbook(write_only=True)
+        write_summary_sheet(wb, header, rows)
+        if validator is not None and validator.quarantined:
+            write_quarantine_sheet(wb, validator.quarantined)
+        wb.save(output)
+    log.info("%s: written", output)
+    return changed
+
+
+def run_sharded(source, output, registry, directory, jobs=None, prefilter=None,
+                deduplicate=False, sort=True, validator=None, metrics=None):
+    """Like run_report(), but write each module to its own workbook in
+    `directory`, concurrently; `output` gets the summary, with every module
+    linked to its workbook, and the quarantined rows."""
+    if metrics is None:
+        metrics = Metrics(source)
+    table = load_issues(source, registry, prefilter=prefilter, validator=validator,
+                        metrics=metrics)
+    log.info("%s: %d issues", source, len(table))
+    table, names = prepare(table, deduplicate, sort, metrics)
+    with metrics.stage('cube', 'aggregate', len(table)):
+        cube = build_cube(table, registry.names)
+    with metrics.stage('shards', 'save', len(table)):
+        for module in write_shards(directory, table, cube, names, jobs):
+            log.debug("%s: written", shard_path(directory, module))
+    log.info("%d module workbooks written to %s", len(cube.modules), directory)
+
+    with metrics.stage('summary', 'save'):
+        wb = Workbook(write_only=True)
+        worksheet = wb.create_sheet("summary")
+        base = os.path.dirname(os.path.abspath(output))
+        rows = []
+        for row in cube.summary_rows():
+            target = os.path.relpath(os.path.abspath(shard_path(directory, row[0])), base)
+            rows.append([link_cell(worksheet, row[0], target.replace(os.sep, '/'))] + row[1:])
+        write_summary_sheet(wb, cube.summary_header(), rows, worksheet=worksheet)
+        if validator is not None and validator.quarantined:
+            write_quarantine_sheet(wb, validator.quarantined)
+        wb.save(output)
+    log.info("%s: written", output)
+    return cube
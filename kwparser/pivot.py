@@ -0,0 +1,144 @@
+"""
+Module x severity x checker count cube.
+
+The cube is built in one vectorized pass over the code arrays of an
+IssueTable: each row's (module, severity, checker) codes are remapped to
+cube axes and counted with a single bincount.  The per-module summaries and
+drill-downs of the scripts are views over it.
+"""
+
+import numpy as np
+
+SEVERITIES = ('Critical', 'Error', 'Warning', 'Review')
+
+
+def _axis_lookup(column, axis):
+    """Array mapping the codes of `column` to positions on `axis` (-1: not on it)."""
+    position = dict((value, i) for i, value in enumerate(axis))
+    return np.array([position.get(value, -1) for value in column.values] or [-1],
+                    dtype=np.int64)
+
+
+def _axis(values, first=(), none=False):
+    """`first`, then the other values sorted (as strings, so that mixed
+    types compare), then None if `none` and it is one of the values."""
+    values = set(values)
+    axis = list(first)
+    axis.extend(sorted((value for value in values if value not in first and value is not None),
+                       key=str))
+    if none and None in values:
+        axis.append(None)
+    return axis
+
+
+class Cube(object):
+
+    def __init__(self, modules, severities, checkers, counts):
+        self.modules = list(modules)
+        self.severities = list(severities)
+        self.checkers = list(checkers)
+        self.counts = counts
+
+    def _module(self, module):
+        return self.modules.index(module)
+
+    def select(self, modules):
+        """Sub-cube of some modules (e.g. to hand one module to a worker)."""
+        index = [self._module(module) for module in modules]
+        return Cube(modules, self.severities, self.checkers, self.counts[index])
+
+    def severity_totals(self):
+        """modules x severities counts."""
+        return self.counts.sum(axis=2)
+
+    def severity_counts(self, module):
+        totals = self.counts[self._module(module)].sum(axis=1)
+        return dict(zip(self.severities, totals.tolist()))
+
+    def summary_header(self):
+        header = ["module"]
+        for i, severity in enumerate(self.severities):
+            header.append("(%d)%s" % (i + 1, severity))
+        return header
+
+    def summary_rows(self):
+        """One [module, count per severity...] row per module."""
+        totals = self.severity_totals().tolist()
+        return [[module] + counts for module, counts in zip(self.modules, totals)]
+
+    def checker_rows(self, module):
+        """[checker, count per severity...] rows for one module, busiest
+        checker first; checkers without issues are left out.
+        """
+        counts = self.counts[self._module(module)].T
+        totals = counts.sum(axis=1)
+        order = np.argsort(-totals, kind='stable')
+        return [[self.checkers[i]] + counts[i].tolist() for i in order if totals[i]]
+
+    def checker_module_rows(self):
+        """[checker, count per module..., total] rows, busiest checker first;
+        checkers without issues are left out."""
+        counts = self.counts.sum(axis=1).T
+        totals = counts.sum(axis=1)
+        order = np.argsort(-totals, kind='stable')
+        return [[self.checkers[i]] + counts[i].tolist() + [int(totals[i])]
+                for i in order if totals[i]]
+
+
+def build_cube(table, modules=None, module_column='module'):
+    """Count `table` rows per (module, severity, checker).
+
+    `modules` fixes the module axis (e.g. the registry order); rows of other
+    modules, including unclassified ones, are left out.  By default every
+    non-empty module value is used.  The severity axis is SEVERITIES followed
+    by any other severity found in the report; rows without a checker are
+    counted under a None checker, last on the checker axis.
+    """
+    module_col = table[module_column]
+    severity_col = table['severity']
+    checker_col = table['checker']
+
+    if modules is None:
+        modules = [value for value in module_col.values if value is not None]
+    severities = _axis(severity_col.values, SEVERITIES)
+    checkers = _axis(checker_col.values, none=True)
+
+    m = _axis_lookup(module_col, modules)[module_col.codes]
+    s = _axis_lookup(severity_col, severities)[severity_col.codes]
+    c = _axis_lookup(checker_col, checkers)[checker_col.codes]
+    keep = (m >= 0) & (s >= 0) & (c >= 0)
+
+    shape = (len(modules), len(severities), len(checkers))
+    size = shape[0] * shape[1] * shape[2]
+    if size:
+        flat = (m[keep] * shape[1] + s[keep]) * shape[2] + c[keep]
+        counts = np.bincount(flat, minlength=size).reshape(shape)
+    else:
+        counts = np.zeros(shape, dtype=np.int64)
+    return Cube(modules, severities, checkers, counts)
+
+
+def merge_cubes(cubes):
+    """Sum partial cubes (e.g. one per sheet or per worker) into one.
+
+    The module axis keeps the order of first appearance; severities and
+    checkers are the union of the partial axes.
+    """
+    modules = []
+    extra = set()
+    checkers = set()
+    for cube in cubes:
+        modules.extend(module for module in cube.modules if module not in modules)
+        extra.update(severity for severity in cube.severities if severity not in SEVERITIES)
+        checkers.update(cube.checkers)
+    severities = _axis(extra, SEVERITIES)
+    checkers = _axis(checkers, none=True)
+
+    positions = [dict((value, i) for i, value in enumerate(axis))
+                 for axis in (modules, severities, checkers)]
+    counts = np.zeros((len(modules), len(severities), len(checkers)), dtype=np.int64)
+    for cube in cubes:
+        index = [[position[value] for value in axis]
+                 for position, axis in zip(positions, (cube.modules, cube.severities, cube.checkers))]
+        counts[np.ix_(*index)] += cube.counts
+    return Cube(modules, severities, checkers, counts)
@@ -0,0 +1,109 @@
+"""
+Early rejection of rows that cannot belong to any module.
+
+Most of a Klocwork export is toolchain noise: the shared gcc work
+directory and the native/cross recipes built for the host.  A PreFilter
+judges each row on its file path alone while the sheet is being parsed.
+Without validation, rejected rows never get their other cells built; with
+it, rows are judged once the Validator has stitched them back together, as
+the lines of a split row have no path of their own.  Decisions are cached
+per distinct path and every drop is counted under the rule that caused it.
+
+Rules live in the "prefilter" section of the registry file::
+
+    "prefilter": {
+        "include": [],
+        "exclude": [
+            {"workdir": "work-shared"},
+            {"arch": "x86_64-linux"},
+            {"recipe": "*-native"}
+        ]
+    }
+
+Each rule matches the workdir, arch and recipe segments of the path with
+shell-style globs; all fields of a rule must match.  If there are include
+rules a row has to match one of them, and a row matching any exclude rule
+is dropped.
+"""
+
+import logging
+from collections import Counter
+from fnmatch import fnmatchcase
+
+from .paths import work_dir_parts
+from .registry import DEFAULT_ANCHOR, DEFAULT_REGISTRY, _read_config
+
+log = logging.getLogger(__name__)
+
+RULE_FIELDS = ('workdir', 'arch', 'recipe')
+
+NOT_INCLUDED = "not included"
+
+
+class Rule(object):
+
+    def __init__(self, fields, name=None):
+        unknown = set(fields) - set(RULE_FIELDS)
+        if unknown:
+            raise ValueError("unknown prefilter field(s): %s" % ", ".join(sorted(unknown)))
+        self.fields = [(RULE_FIELDS.index(field), pattern) for field, pattern in fields.items()]
+        self.name = name or " ".join("%s=%s" % item for item in sorted(fields.items()))
+
+    def matches(self, parts):
+        for index, pattern in self.fields:
+            value = parts[index]
+            if value is None or not fnmatchcase(value, pattern):
+                return False
+        return True
+
+
+class PreFilter(object):
+
+    def __init__(self, include=(), exclude=(), anchor=DEFAULT_ANCHOR):
+        self.include = [rule if isinstance(rule, Rule) else Rule(rule) for rule in include]
+        self.exclude = [rule if isinstance(rule, Rule) else Rule(rule) for rule in exclude]
+        self.anchor = anchor
+        self.dropped = Counter()
+        self._decisions = {}
+
+    def __bool__(self):
+        return bool(self.include or self.exclude)
+
+    def reason(self, path):
+        """Name of the rule dropping `path`, or None if it is kept."""
+        parts = work_dir_parts(path, self.anchor)
+        if self.include and not any(rule.matches(parts) for rule in self.include):
+            return NOT_INCLUDED
+        for rule in self.exclude:
+            if rule.matches(parts):
+                return rule.name
+        return None
+
+    def __call__(self, path):
+        """True if the row of `path` is kept; usable as the reader's `accept`."""
+        try:
+            reason = self._decisions[path]
+        except KeyError:
+            reason = self._decisions[path] = self.reason(path)
+        if reason is None:
+            return True
+        self.dropped[reason] += 1
+        return False
+
+    def report(self):
+        total = sum(self.dropped.values())
+        if total:
+            log.info("prefilter dropped %d rows", total)
+            for reason, count in self.dropped.most_common():
+                log.info("  %8d  %s", count, reason)
+        return total
+
+
+def load_prefilter(filename=None):
+    """The PreFilter of the registry file (defaults to modules.json)."""
+    if filename is None:
+        filename = DEFAULT_REGISTRY
+    config = _read_config(filename)
+    rules = config.get('prefilter', {})
+    return PreFilter(rules.get('include', ()), rules.get('exclude', ()),
+                     config.get('anchor', DEFAULT_ANCHOR))
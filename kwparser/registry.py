@@ -0,0 +1,132 @@
+"""
+Module registry: maps Klocwork file paths to the module that owns them.
+
+The registry is loaded from a JSON, TOML or YAML file (see modules.json)
+and compiled into a PathMatcher, a trie keyed on the path segments below
+the build tmpdir (``poky/build/tmp-glibc/``).  Classifying a path walks at
+most one trie level per segment, so the cost does not grow with the number
+of registered modules.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+DEFAULT_REGISTRY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules.json')
+
+DEFAULT_ANCHOR = "poky/build/tmp-glibc/"
+
+Module = namedtuple('Module', 'name path')
+
+_MODULE = '/'  # trie key holding the module name; never a path segment
+
+
+class PathMatcher(object):
+    """Longest-prefix matcher over the directory segments below `anchor`."""
+
+    def __init__(self, modules, anchor=DEFAULT_ANCHOR):
+        self.anchor = anchor
+        self.depth = 0
+        self._root = {}
+        for module in modules:
+            self.add(module.name, module.path)
+
+    def add(self, name, path):
+        pos = path.find(self.anchor)
+        if pos < 0:
+            raise ValueError("module %s: path %r is not below %r" % (name, path, self.anchor))
+        segments = path[pos + len(self.anchor):].strip('/').split('/')
+        node = self._root
+        for segment in segments:
+            node = node.setdefault(segment, {})
+        if _MODULE in node and node[_MODULE] != name:
+            raise ValueError("module %s: path %r is already registered to %s"
+                             % (name, path, node[_MODULE]))
+        node[_MODULE] = name
+        self.depth = max(self.depth, len(segments))
+
+    def match(self, file_path):
+        """Return the module owning `file_path`, or None."""
+        if not file_path or not isinstance(file_path, str):
+            return None
+        pos = file_path.find(self.anchor)
+        if pos < 0:
+            return None
+        segments = file_path[pos + len(self.anchor):].split('/', self.depth)
+        found = None
+        node = self._root
+        # the last segment is the file name (or the unsplit remainder)
+        for segment in segments[:-1]:
+            node = node.get(segment)
+            if node is None:
+                break
+            found = node.get(_MODULE, found)
+        return found
+
+
+class Registry(object):
+
+    def __init__(self, modules, anchor=DEFAULT_ANCHOR):
+        self.anchor = anchor
+        self.modules = list(modules)
+        self.names = [module.name for module in self.modules]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("duplicate module names in registry")
+        self.matcher = PathMatcher(self.modules, anchor)
+
+    def __len__(self):
+        return len(self.modules)
+
+    def __iter__(self):
+        return iter(self.modules)
+
+    def match(self, file_path):
+        return self.matcher.match(file_path)
+
+
+def _read_config(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.json':
+        with open(filename, encoding='utf-8') as f:
+            return json.load(f)
+    if ext == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("tomli is required to read %s on Python < 3.11" % filename)
+        with open(filename, 'rb') as f:
+            return tomllib.load(f)
+    if ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is required to read %s" % filename)
+        with open(filename, encoding='utf-8') as f:
+            return yaml.safe_load(f)
+    raise ValueError("unsupported registry format: %s" % filename)
+
+
+def _module_path(entry, defaults, anchor):
+    if 'path' in entry:
+        return entry['path']
+    fields = dict(defaults)
+    fields.update(entry)
+    parts = [fields['workdir'], fields['arch'], fields['recipe']]
+    if fields.get('subpath'):
+        parts.append(fields['subpath'].strip('/'))
+    return anchor + '/'.join(parts) + '/'
+
+
+def load_registry(filename=None):
+    """Load and compile the module registry (defaults to modules.json)."""
+    if filename is None:
+        filename = DEFAULT_REGISTRY
+    config = _read_config(filename)
+    anchor = config.get('anchor', DEFAULT_ANCHOR)
+    defaults = config.get('defaults', {})
+    modules = [Module(entry['name'], _module_path(entry, defaults, anchor))
+               for entry in config['modules']]
+    return Registry(modules, anchor)
@@ -0,0 +1,88 @@
+"""
+Worksheet rows written as xml, outside openpyxl.
+
+Copying a large sheet through a write-only openpyxl worksheet builds a cell
+object for every value, which costs twice the parsing of the sheet.  The
+rows of a Klocwork export are plain values, so they are serialized here
+directly, as openpyxl would write them: strings inline, so that the rows
+need no shared string table and can be written by several processes.
+The rows end up in files, and splice_sheets() puts them into the empty
+sheets of a workbook openpyxl has saved.
+"""
+
+import os
+import re
+import shutil
+import zipfile
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter
+
+from .xlsxreader import KlocworkWorkbook
+
+_letters = []
+
+_EMPTY_SHEET_DATA = re.compile(br'<sheetData\s*/>|<sheetData>\s*</sheetData>')
+
+
+def _column_letter(index):
+    while len(_letters) <= index:
+        _letters.append(get_column_letter(len(_letters) + 1))
+    return _letters[index]
+
+
+def row_xml(number, values):
+    """The <row> element of row `number` holding `values` (from column A)."""
+    cells = []
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        ref = "%s%d" % (_column_letter(index), number)
+        if isinstance(value, str):
+            space = ' xml:space="preserve"' if value != value.strip() else ''
+            cells.append('<c r="%s" t="inlineStr"><is><t%s>%s</t></is></c>'
+                         % (ref, space, escape(value)))
+        elif isinstance(value, bool):
+            cells.append('<c r="%s" t="b"><v>%d</v></c>' % (ref, value))
+        else:
+            cells.append('<c r="%s" t="n"><v>%r</v></c>' % (ref, value))
+    return '<row r="%d">%s</row>' % (number, ''.join(cells))
+
+
+def write_rows(f, rows):
+    """Write the (row number, row) pairs of `rows` to the text file `f` as
+    they are yielded on."""
+    for number, row in rows:
+        f.write(row_xml(number, row))
+        yield number, row
+
+
+def splice_sheets(filename, fragments):
+    """Fill the empty sheets of the saved workbook `filename` with rows.
+
+    `fragments` maps sheet names to the files (written by write_rows())
+    holding their rows, in order.  The workbook is rewritten member by
+    member, the rows streamed from the files into their sheets.
+    """
+    with KlocworkWorkbook(filename) as workbook:
+        members = dict((workbook.member(sheet), paths) for sheet, paths in fragments.items())
+    spliced = filename + '.splice'
+    with zipfile.ZipFile(filename) as source, \
+            zipfile.ZipFile(spliced, 'w', zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            data = source.read(info)
+            paths = members.get(info.filename)
+            match = _EMPTY_SHEET_DATA.search(data) if paths else None
+            if match is None:
+                target.writestr(info, data)
+                continue
+            member = zipfile.ZipInfo(info.filename, info.date_time)
+            member.compress_type = zipfile.ZIP_DEFLATED
+            with target.open(member, 'w', force_zip64=True) as out:
+                out.write(data[:match.start()] + b'<sheetData>')
+                for path in paths:
+                    with open(path, 'rb') as f:
+                        shutil.copyfileobj(f, out)
+                out.write(b'</sheetData>' + data[match.end():])
+    shutil.copymode(filename, spliced)
+    os.replace(spliced, filename)
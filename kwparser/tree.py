@@ -0,0 +1,114 @@
+"""
+Directory tree of the files of a Klocwork export, with issue counts.
+
+Every distinct file path of an IssueTable is split once (see
+paths.split_path) and inserted into a tree keyed on the path segments below
+the build tmpdir: workdir, arch, recipe, version, then the source
+directories and the file name.  Each node counts the issues of its whole
+subtree, so the issues of a module, a recipe or any directory are a walk of
+a few nodes instead of a scan over the rows.
+"""
+
+import numpy as np
+
+from .paths import split_path
+from .registry import DEFAULT_ANCHOR
+
+
+class Node(object):
+    __slots__ = ('count', 'children')
+
+    def __init__(self):
+        self.count = 0
+        self.children = {}
+
+
+def _segments(parts):
+    head = [part for part in (parts.workdir, parts.arch, parts.recipe, parts.version) if part]
+    return head + parts.source.split('/')
+
+
+class DirectoryTree(object):
+
+    def __init__(self, anchor=DEFAULT_ANCHOR):
+        self.anchor = anchor
+        self.root = Node()
+        self.outside = 0  # issues of files outside the build tmpdir
+        self.parts = []  # BuildPath of each file code, set by from_table()
+
+    @classmethod
+    def from_table(cls, table, column='file', anchor=DEFAULT_ANCHOR):
+        """Tree of the `column` paths of `table`; each distinct path is
+        split and inserted once, weighted with its number of issues."""
+        tree = cls(anchor)
+        col = table[column]
+        counts = np.bincount(col.codes, minlength=len(col.values))
+        tree.parts = [split_path(value, anchor) if value else None for value in col.values]
+        for parts, count in zip(tree.parts, counts.tolist()):
+            if count and parts is not None:
+                tree.add(parts, count)
+        return tree
+
+    def add(self, parts, count=1):
+        """Count `count` issues against the file of BuildPath `parts`."""
+        if parts.root is None:
+            self.outside += count
+            return
+        node = self.root
+        node.count += count
+        for segment in _segments(parts):
+            node = node.children.setdefault(segment, Node())
+            node.count += count
+
+    def node(self, path):
+        """Node of a directory or file; `path` is either a full path or
+        relative to the build tmpdir.  None if no issue is below it."""
+        pos = path.find(self.anchor)
+        if pos >= 0:
+            path = path[pos + len(self.anchor):]
+        node = self.root
+        for segment in path.strip('/').split('/'):
+            if not segment:
+                continue
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def count(self, path):
+        node = self.node(path)
+        return node.count if node is not None else 0
+
+    def children(self, path):
+        """[(name, count)] below `path`, busiest first."""
+        node = self.node(path)
+        if node is None:
+            return []
+        return sorted(((name, child.count) for name, child in node.children.items()),
+                      key=lambda item: -item[1])
+
+    def rows(self, path, depth=None):
+        """[(relative path, count)] of every directory and file below `path`
+        (down to `depth` levels), depth-first with the busiest entries first.
+        Directories end with '/'."""
+        node = self.node(path)
+        rows = []
+        if node is None:
+            return rows
+        stack = [('', node, 0)]
+        while stack:
+            prefix, node, level = stack.pop()
+            if prefix:
+                rows.append((prefix if node.children else prefix[:-1], node.count))
+            if depth is not None and level >= depth:
+                continue
+            children = sorted(node.children.items(), key=lambda item: (-item[1].count, item[0]))
+            # pushed in reverse, so the busiest is popped first
+            for name, child in reversed(children):
+                stack.append((prefix + name + '/', child, level + 1))
+        return rows
+
+    def module_counts(self, registry):
+        """{module name: issues} read from the tree; a module registered
+        below another one is also counted in the outer module."""
+        return dict((module.name, self.count(module.path)) for module in registry)
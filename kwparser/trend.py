@@ -0,0 +1,169 @@
+"""
+Build-over-build trend store.
+
+Every run appends the non-zero cells of its module x severity x checker
+cube to a directory of flat column files (build, module, severity,
+checker, count; int32 each), so a run costs a few kB whatever the size of
+the report.  ``names.json`` maps the integer codes to names and
+``builds.jsonl`` records each build's id, timestamp and row range; a build
+is only visible once its line is written, so an interrupted append leaves
+the store readable.  Rollups over hundreds of builds are a bincount over
+memory-mapped columns; old reports are never read again.
+"""
+
+import datetime
+import json
+import os
+
+import numpy as np
+
+COLUMNS = ('build', 'module', 'severity', 'checker', 'count')
+
+NAMES_FILE = 'names.json'
+BUILDS_FILE = 'builds.jsonl'
+
+
+class TrendStore(object):
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.names = {'module': [], 'severity': [], 'checker': []}
+        path = os.path.join(directory, NAMES_FILE)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.names.update(json.load(f))
+        self._builds = None
+
+    def _column_path(self, name):
+        return os.path.join(self.directory, "%s.i4" % name)
+
+    def builds(self):
+        """[{'build', 'timestamp', 'start', 'stop'}] in the order appended."""
+        if self._builds is None:
+            self._builds = []
+            path = os.path.join(self.directory, BUILDS_FILE)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self._builds = [json.loads(line) for line in f if line.strip()]
+        return self._builds
+
+    def __contains__(self, build):
+        return any(record['build'] == str(build) for record in self.builds())
+
+    def unique_build(self, name):
+        """`name`, or `name-2`, `name-3`... if the store already has it."""
+        build = name = str(name)
+        count = 1
+        while build in self:
+            count += 1
+            build = "%s-%d" % (name, count)
+        return build
+
+    def _codes(self, axis, values):
+        names = self.names[axis]
+        position = dict((value, i) for i, value in enumerate(names))
+        for value in values:
+            if value not in position:
+                position[value] = len(names)
+                names.append(value)
+        return np.array([position[value] for value in values], dtype=np.int32)
+
+    def append(self, build, cube, timestamp=None):
+        """Add the counts of `cube` as build `build`."""
+        build = str(build)
+        if build in self:
+            raise ValueError("build %s is already in the trend store" % build)
+        if timestamp is None:
+            timestamp = datetime.datetime.now().isoformat(timespec='seconds')
+
+        m, s, c = np.nonzero(cube.counts)
+        columns = {
+            'module': self._codes('module', cube.modules)[m],
+            'severity': self._codes('severity', cube.severities)[s],
+            'checker': self._codes('checker', cube.checkers)[c],
+            'count': cube.counts[m, s, c].astype(np.int32),
+        }
+        columns['build'] = np.full(len(m), len(self.builds()), dtype=np.int32)
+
+        start = self._rows()
+        for name in COLUMNS:
+            with open(self._column_path(name), 'ab') as f:
+                f.truncate(start * 4)  # drop the tail of an interrupted append
+                columns[name].tofile(f)
+        path = os.path.join(self.directory, NAMES_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.names, f)
+        os.replace(path + '.tmp', path)
+        record = {'build': build, 'timestamp': timestamp, 'start': start, 'stop': start + len(m)}
+        with open(os.path.join(self.directory, BUILDS_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        self.builds().append(record)
+
+    def _rows(self):
+        builds = self.builds()
+        return builds[-1]['stop'] if builds else 0
+
+    def column(self, name):
+        """Memory-mapped column over the rows of all recorded builds."""
+        rows = self._rows()
+        if not rows:
+            return np.zeros(0, dtype=np.int32)
+        return np.memmap(self._column_path(name), dtype=np.int32, mode='r', shape=(rows,))
+
+    def _build_index(self, build):
+        for i, record in enumerate(self.builds()):
+            if record['build'] == str(build):
+                return i
+        raise KeyError("no build %s in the trend store" % build)
+
+    def severity_trend(self, severity='Critical', modules=None):
+        """Header and one [build, timestamp, count per module...] row per
+        build, for one severity."""
+        if modules is None:
+            modules = self.names['module']
+        header = ["build", "timestamp"] + list(modules)
+        builds = self.builds()
+        if severity not in self.names['severity'] or not builds:
+            return header, [[record['build'], record['timestamp']] + [0] * len(modules)
+                            for record in builds]
+        position = dict((value, i) for i, value in enumerate(self.names['module']))
+        lookup = np.array([position.get(module, -1) for module in modules])
+
+        code = self.names['severity'].index(severity)
+        keep = self.column('severity') == code
+        width = len(self.names['module'])
+        flat = self.column('build')[keep].astype(np.int64) * width + self.column('module')[keep]
+        counts = np.bincount(flat, weights=self.column('count')[keep],
+                             minlength=len(builds) * width).reshape(len(builds), width)
+        counts = np.hstack([counts, np.zeros((len(builds), 1))])[:, lookup].astype(np.int64)
+        return header, [[record['build'], record['timestamp']] + row
+                        for record, row in zip(builds, counts.tolist())]
+
+    def _checker_counts(self, index):
+        record = self.builds()[index]
+        window = slice(record['start'], record['stop'])
+        width = len(self.names['checker'])
+        flat = (self.column('module')[window].astype(np.int64) * width
+                + self.column('checker')[window])
+        return np.bincount(flat, weights=self.column('count')[window],
+                           minlength=len(self.names['module']) * width).astype(np.int64)
+
+    def top_movers(self, old=None, new=None, count=20):
+        """[module, checker, old, new, change] of the (module, checker) pairs
+        whose issue count changed most between two builds (default: the last
+        two), largest change first."""
+        builds = self.builds()
+        if len(builds) < 2 and (old is None or new is None):
+            return []
+        old_index = self._build_index(old) if old is not None else len(builds) - 2
+        new_index = self._build_index(new) if new is not None else len(builds) - 1
+        before = self._checker_counts(old_index)
+        after = self._checker_counts(new_index)
+        change = after - before
+        order = np.argsort(-np.abs(change), kind='stable')[:count]
+        width = len(self.names['checker'])
+        return [[self.names['module'][i // width], self.names['checker'][i % width],
+                 int(before[i]), int(after[i]), int(change[i])]
+                for i in order.tolist() if change[i]]
@@ -0,0 +1,203 @@
+"""
+Validation and repair of malformed export rows while they are parsed.
+
+A message holding source code can break its row in two ways: a ';' splits
+it across cells, pushing state, status and owner to the right (past column
+H), or a line break splits the row itself, the rest of the message and the
+trailing columns continuing on the next row.  The state column tells these
+rows apart: Klocwork only knows a handful of states, while a spilled cell
+holds a piece of the message.
+
+A Validator wraps the row stream of the reader.  A row with a known state
+and nothing past column H passes through whatever its severity and status
+(values outside the usual vocabularies are only counted).  A shifted row
+is repaired by joining the spilled cells back into the message; a split
+row is stitched to the next row if that one continues it: it is not a
+complete row itself, has no file path in column A and ends with the
+state, status and owner of the issue.  A file path is an absolute path
+or one below the build tmpdir, without blanks: a line of source code such
+as ``b/c;`` is not one.
+Rows that cannot be repaired are kept aside (quarantined) with the reason,
+for a side sheet of the report; the rows kept can then be judged by the
+prefilter.  Everything happens in the one pass over the export.
+"""
+
+import logging
+import re
+from collections import Counter
+
+from .pivot import SEVERITIES
+from .registry import DEFAULT_ANCHOR
+from .xlsxreader import REPORT_COLUMNS
+
+log = logging.getLogger(__name__)
+
+STATES = ('New', 'Existing', 'Recurred', 'Fixed', 'Not in scope')
+
+STATUSES = ('Analyze', 'Ignore', 'Not a Problem', 'Fix', 'Fix in Next Release',
+            'Fix in Later Release', 'Defer', 'Filter')
+
+# columns read per row, so that cells pushed past column H are seen
+SPILL_WIDTH = 16
+
+# between the cells of a message split at a ';', and the lines of a split row
+SEPARATOR = "; "
+LINE_BREAK = "\n"
+
+_FILE = REPORT_COLUMNS.index('file')
+_SEVERITY = REPORT_COLUMNS.index('severity')
+_MESSAGE = REPORT_COLUMNS.index('message')
+_STATE = REPORT_COLUMNS.index('state')
+_STATUS = REPORT_COLUMNS.index('status')
+
+# a path has no blanks nor ';' (lines of source code have), and is either
+# absolute, without opening a comment, or below the build tmpdir
+_PATH = re.compile(r'[^\s;]+$')
+_ABSOLUTE = re.compile(r'(?:[A-Za-z]:)?[/\\](?![/*])')
+
+
+def is_path(value, anchor=DEFAULT_ANCHOR):
+    """True if the column A value `value` looks like the file path of an
+    issue: an absolute path, or one below the build tmpdir `anchor`."""
+    if not isinstance(value, str) or _PATH.match(value) is None:
+        return False
+    return anchor in value or _ABSOLUTE.match(value) is not None
+
+
+def _trim(row):
+    """The cells of `row` up to the last one holding a value."""
+    cells = list(row)
+    while cells and cells[-1] is None:
+        cells.pop()
+    return cells
+
+
+class Validator(object):
+
+    def __init__(self, severities=SEVERITIES, states=STATES, statuses=STATUSES,
+                 width=SPILL_WIDTH, anchor=DEFAULT_ANCHOR):
+        self.severities = frozenset(severities)
+        self.states = frozenset(states)
+        self.statuses = frozenset(statuses)
+        self.width = max(width, len(REPORT_COLUMNS))
+        self.anchor = anchor
+        self.repaired = Counter()
+        # (column, value) -> rows passed with a severity or status outside
+        # the vocabularies
+        self.unknown = Counter()
+        self.quarantined = []
+
+    def clear(self):
+        self.repaired.clear()
+        self.unknown.clear()
+        del self.quarantined[:]
+
+    def _quarantine(self, reason, cells):
+        self.quarantined.append([reason] + cells)
+
+    def _count(self, row):
+        if row[_SEVERITY] not in self.severities:
+            self.unknown['severity', row[_SEVERITY]] += 1
+        if row[_STATUS] not in self.statuses:
+            self.unknown['status', row[_STATUS]] += 1
+
+    def repair(self, cells):
+        """The report row of the trimmed `cells` whose message may run over
+        several cells, or None if they do not end with a state, status and
+        owner (or a state and status)."""
+        count = len(cells)
+        for state in (count - 3, count - 2):
+            if state >= _STATE and cells[state] in self.states and cells[state + 1] is not None:
+                message = SEPARATOR.join(format(cell) for cell in cells[_MESSAGE:state]
+                                         if cell is not None)
+                tail = cells[state:state + 3] + [None] * (state + 3 - count)
+                return tuple(cells[:_MESSAGE]) + (message,) + tuple(tail)
+        return None
+
+    def _join(self, pending, cells):
+        """`pending` with the next line `cells` appended to its last cell."""
+        last = LINE_BREAK.join(format(value) for value in (pending[-1], cells[0])
+                               if value is not None)
+        return pending[:-1] + [last] + cells[1:]
+
+    def _keep(self, row, accept, repair=None):
+        """True if the report row `row` is kept by `accept`; counts its
+        repair and its unknown values if it is."""
+        if accept is not None and not accept(row[_FILE]):
+            return False
+        if repair is not None:
+            self.repaired[repair] += 1
+        if row[_SEVERITY] not in self.severities or row[_STATUS] not in self.statuses:
+            self._count(row)
+        return True
+
+    def __call__(self, rows, accept=None):
+        """Yield the report rows of `rows` (read `width` cells wide), good
+        or repaired; the others are added to `quarantined`.
+
+        `accept` (such as a PreFilter) judges the column A value of every
+        row once it is whole, so that a split row is kept or dropped along
+        with its continuation.
+        """
+        width = len(REPORT_COLUMNS)
+        blank = (None,) * (self.width - width)
+        states = self.states
+        # an issue missing its trailing columns, waiting for its continuation
+        pending = None
+        for row in rows:
+            if pending is None and row[_STATE] in states and row[width:] == blank:
+                if self._keep(row, accept):
+                    yield row[:width]
+                continue
+            cells = _trim(row)
+            if not cells:
+                continue
+            whole = row[_STATE] in states and row[width:] == blank
+            if pending is not None:
+                if not whole and not is_path(cells[_FILE], self.anchor):
+                    joined = self._join(pending, cells)
+                    fixed = self.repair(joined)
+                    if fixed is not None:
+                        pending = None
+                        if self._keep(fixed, accept, 'split row'):
+                            yield fixed
+                        continue
+                    if len(cells) == 1:
+                        # a line in the middle of the message
+                        pending = joined
+                        continue
+                self._quarantine("no state after the message", pending)
+                pending = None
+                if whole:
+                    if self._keep(row[:width], accept):
+                        yield row[:width]
+                    continue
+            if not is_path(cells[_FILE], self.anchor):
+                self._quarantine("no state, nor a file path to start an issue", cells)
+                continue
+            # a row shifted by a ';' has its state past column F, even with
+            # an empty owner
+            fixed = self.repair(cells) if len(cells) >= width else None
+            repair = 'shifted row'
+            if fixed is None and row[_STATE] in states:
+                # extra columns past H, with the report columns in place
+                fixed = row[:width]
+                repair = None
+            if fixed is None:
+                pending = cells
+                continue
+            if self._keep(fixed, accept, repair):
+                yield fixed
+        if pending is not None:
+            self._quarantine("no state after the message", pending)
+
+    def report(self):
+        for reason, count in self.repaired.most_common():
+            log.info("validate: %d %ss repaired", count, reason)
+        for (column, value), count in self.unknown.most_common():
+            log.info("validate: %d rows with %s %r", count, column, value)
+        if self.quarantined:
+            log.warning("validate: %d rows quarantined", len(self.quarantined))
+            for row in self.quarantined:
+                log.debug("  %s: %s", row[0], row[1:])
+        return len(self.quarantined)
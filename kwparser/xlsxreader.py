@@ -0,0 +1,359 @@
+"""
+Fast reader for Klocwork export workbooks.
+
+A Klocwork export is a plain table of strings, so there is no need for
+openpyxl's Cell objects: the xlsx zip is opened directly and
+``xl/sharedStrings.xml`` and ``xl/worksheets/sheetN.xml`` are stream-parsed
+with iterparse.  Rows come out as plain tuples of the 8 report columns.
+
+A large sheet can also be cut into chunks of rows, on the tag boundaries of
+its xml, so that several processes parse one sheet (see chunks()).
+"""
+
+import posixpath
+import re
+import zipfile
+from collections import namedtuple
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+
+REPORT_COLUMNS = ('file', 'severity', 'checker', 'function',
+                  'message', 'state', 'status', 'owner')
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_ROW = NS_MAIN + 'row'
+_CELL = NS_MAIN + 'c'
+_VALUE = NS_MAIN + 'v'
+_INLINE = NS_MAIN + 'is'
+_TEXT = NS_MAIN + 't'
+_SI = NS_MAIN + 'si'
+_PHONETIC = NS_MAIN + 'rPh'
+_SHEET_DATA = NS_MAIN + 'sheetData'
+_COL = NS_MAIN + 'col'
+
+_DIGITS = '0123456789'
+
+# columns of an Excel sheet (A:XFD)
+_MAX_COLUMNS = 16384
+
+# bytes of sheet xml per chunk, and per read while looking for the rows
+CHUNK_BYTES = 1 << 21
+_BLOCK = 1 << 20
+
+# the first row, or the end of rows of a sheet without any, and the root
+# element; no tag name is longer than _OVERLAP
+_FIRST_TAG = re.compile(br'<(/?)((?:[\w.-]+:)?)(row|sheetData)[\s/>]')
+_ROOT_TAG = re.compile(br'<((?:[\w.-]+:)?worksheet)[\s>]')
+_OVERLAP = 64
+
+# what may follow the name in a <row> tag (and not in <rowBreaks>)
+_AFTER_NAME = (b' ', b'>', b'/', b'\t', b'\n', b'\r')
+
+# `first` numbers the rows of the chunk when they have no r attribute
+Chunk = namedtuple('Chunk', 'sheet head tail start stop first')
+
+_column_cache = {}
+
+
+def column_index(letters):
+    """Zero based index of a column name, 'A' -> 0."""
+    index = _column_cache.get(letters)
+    if index is None:
+        index = 0
+        for char in letters:
+            index = index * 26 + ord(char) - 64
+        index -= 1
+        _column_cache[letters] = index
+    return index
+
+
+def _text(element):
+    # a string item is either a single <t> or rich text runs <r><t/></r>;
+    # phonetic hints (<rPh>) are not part of the value
+    text = element.find(_TEXT)
+    if text is not None:
+        return text.text or ''
+    return ''.join(t.text or '' for r in element if r.tag != _PHONETIC
+                   for t in r.iter(_TEXT))
+
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _find_tag(buf, tag, start, end):
+    """Offset of the first `tag` element starting in buf[start:end], or -1."""
+    size = len(tag)
+    position = buf.find(tag, start, end + size - 1)
+    while position >= 0 and buf[position + size:position + size + 1] not in _AFTER_NAME:
+        position = buf.find(tag, position + 1, end + size - 1)
+    return position
+
+
+def _count_tags(buf, tag, start, end):
+    """Number of `tag` elements starting in buf[start:end]."""
+    return sum(buf.count(tag + after, start, end + len(tag)) for after in _AFTER_NAME)
+
+
+class KlocworkWorkbook(object):
+    """Read-only view of an xlsx file: sheet names and streamed rows."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._zip = zipfile.ZipFile(filename)
+        self._sheets, self.active = self._read_workbook()
+        self._shared = None
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def sheetnames(self):
+        return [name for name, path in self._sheets]
+
+    def _read_workbook(self):
+        targets = {}
+        with self._zip.open('xl/_rels/workbook.xml.rels') as f:
+            for event, element in iterparse(f):
+                if element.tag == NS_PKG_REL + 'Relationship':
+                    target = element.get('Target')
+                    if target.startswith('/'):
+                        target = target[1:]
+                    else:
+                        target = posixpath.normpath(posixpath.join('xl', target))
+                    targets[element.get('Id')] = target
+        sheets = []
+        active = 0
+        with self._zip.open('xl/workbook.xml') as f:
+            for event, element in iterparse(f):
+                if element.tag == NS_MAIN + 'sheet':
+                    sheets.append((element.get('name'), targets[element.get(NS_REL + 'id')]))
+                elif element.tag == NS_MAIN + 'workbookView':
+                    active = int(element.get('activeTab', 0))
+        return sheets, sheets[active][0] if active < len(sheets) else sheets[0][0]
+
+    def shared_strings(self):
+        if self._shared is None:
+            shared = []
+            if 'xl/sharedStrings.xml' in self._zip.namelist():
+                with self._zip.open('xl/sharedStrings.xml') as f:
+                    for event, element in iterparse(f):
+                        if element.tag == _SI:
+                            shared.append(_text(element))
+                            element.clear()
+            self._shared = shared
+        return self._shared
+
+    def member(self, sheet=None):
+        """Name of the zip member holding `sheet` (default: the active one)."""
+        if sheet is None:
+            sheet = self.active
+        for name, path in self._sheets:
+            if name == sheet:
+                return path
+        raise KeyError("Worksheet %s does not exist." % sheet)
+
+    def column_widths(self, sheet=None):
+        """{column index: width} of the columns of `sheet` given a width."""
+        widths = {}
+        with self._zip.open(self.member(sheet)) as f:
+            for event, element in iterparse(f, events=('start',)):
+                if element.tag == _COL:
+                    width = element.get('width')
+                    if width is not None:
+                        for index in range(int(element.get('min')) - 1, int(element.get('max'))):
+                            widths[index] = float(width)
+                elif element.tag == _SHEET_DATA:
+                    # <cols> comes before the cells
+                    break
+        return widths
+
+    def iter_rows(self, sheet=None, width=len(REPORT_COLUMNS), accept=None):
+        """Yield every row of `sheet` (default: the active one) as a tuple.
+
+        Only the first `width` columns are kept; short rows are padded
+        with None and blank rows are skipped.  With a `width` of None every
+        cell is kept, and each row ends at its last value.  If `accept` is
+        given it is called with the value of column A, and rows it rejects
+        are dropped before their other cells are looked at.
+        """
+        with self._zip.open(self.member(sheet)) as f:
+            for number, row in self._rows(f, width, accept):
+                yield row
+
+    def chunks(self, sheet=None, size=CHUNK_BYTES):
+        """Cut the rows of `sheet` into Chunks of about `size` bytes of xml.
+
+        The sheet is decompressed once, in blocks, and only searched for
+        row tags; a chunk starts with a row and records the xml needed to
+        parse it on its own (see iter_chunk()).  A sheet without rows gives
+        one empty chunk.
+        """
+        starts = []  # (offset, rows before it) of each chunk
+        stop = head = tail = row_tag = end_tag = None
+        with self._zip.open(self.member(sheet)) as f:
+            buf = b''
+            offset = 0  # of buf in the sheet xml
+            scan = 0  # the rows starting before it are counted
+            rows = 0
+            while True:
+                block = f.read(_BLOCK)
+                buf += block
+                # a tag cut by the end of the block is found in the next one
+                limit = max(len(buf) - _OVERLAP, 0) if block else len(buf)
+                if head is None:
+                    # the xml before the first row is kept whole for the head
+                    first = None
+                    for match in _FIRST_TAG.finditer(buf, scan):
+                        if match.start() >= limit or match.group(1) or match.group(3) == b'row':
+                            first = match
+                            break
+                    if first is None or first.start() >= limit:
+                        scan = limit
+                        if not block:
+                            break
+                        continue
+                    closing, prefix, name = first.groups()
+                    root = _ROOT_TAG.search(buf, 0, first.start())
+                    if closing or root is None:
+                        # no rows
+                        break
+                    head = buf[:first.start()]
+                    tail = b'</%ssheetData></%s>' % (prefix, root.group(1))
+                    row_tag = b'<' + prefix + b'row'
+                    end_tag = b'</' + prefix + b'sheetData>'
+                    scan = first.start()
+                    starts.append((scan, 0))
+                end = buf.find(end_tag, scan)
+                upto = end if end >= 0 else limit
+                position = max(starts[-1][0] - offset + size, scan)
+                while position < upto:
+                    position = _find_tag(buf, row_tag, position, upto)
+                    if position < 0:
+                        break
+                    starts.append((offset + position,
+                                   rows + _count_tags(buf, row_tag, scan, position)))
+                    position += size
+                rows += _count_tags(buf, row_tag, scan, upto)
+                if end >= 0:
+                    stop = offset + end
+                    break
+                if not block:
+                    break
+                offset += limit
+                buf = buf[limit:]
+                scan = 0
+        if stop is None:
+            return [Chunk(sheet, b'', b'', 0, 0, 1)]
+        stops = [position for position, before in starts[1:]] + [stop]
+        return [Chunk(sheet, head, tail, position, end, before + 1)
+                for (position, before), end in zip(starts, stops)]
+
+    def iter_chunk(self, chunk, width=len(REPORT_COLUMNS)):
+        """Yield (row number, row) for the rows of a Chunk of chunks(),
+        as iter_rows() reads them."""
+        if chunk.stop <= chunk.start:
+            return
+        with self._zip.open(self.member(chunk.sheet)) as f:
+            # skipped in blocks: ZipExtFile.seek() reads up to 16MB at a time
+            skip = chunk.start
+            while skip > 0:
+                skip -= len(f.read(min(skip, _BLOCK)))
+            body = f.read(chunk.stop - chunk.start)
+        xml = BytesIO(chunk.head + body + chunk.tail)
+        for item in self._rows(xml, width, first=chunk.first):
+            yield item
+
+    def _rows(self, f, width, accept=None, first=1):
+        """Yield (row number, row) for the rows of the sheet xml `f`; rows
+        without an r attribute follow the previous one, from `first`."""
+        shared = self.shared_strings()
+        full = width is None
+        if full:
+            width = _MAX_COLUMNS
+            empty = []
+        else:
+            empty = [None] * width
+        number = first - 1
+        sheet_data = None
+        for event, element in iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == _SHEET_DATA:
+                    sheet_data = element
+                continue
+            if element.tag != _ROW:
+                continue
+            ref = element.get('r')
+            number = int(ref) if ref is not None else number + 1
+            values = list(empty)
+            position = 0
+            # column A is judged as soon as the parser is past it
+            pending = accept is not None
+            rejected = False
+            for cell in element:
+                ref = cell.get('r')
+                if ref is not None:
+                    position = column_index(ref.rstrip(_DIGITS))
+                if pending and position > 0:
+                    pending = False
+                    if not accept(values[0] if values else None):
+                        rejected = True
+                        break
+                if position < width:
+                    if full and position >= len(values):
+                        values.extend([None] * (position + 1 - len(values)))
+                    kind = cell.get('t')
+                    if kind == 'inlineStr':
+                        inline = cell.find(_INLINE)
+                        values[position] = _text(inline) if inline is not None else None
+                    else:
+                        value = cell.findtext(_VALUE)
+                        # formulas written by openpyxl have an empty <v/>
+                        if not value:
+                            pass
+                        elif kind == 's':
+                            values[position] = shared[int(value)]
+                        elif kind == 'str' or kind == 'e':
+                            values[position] = value
+                        elif kind == 'b':
+                            values[position] = value == '1'
+                        else:
+                            values[position] = _number(value)
+                position += 1
+            if pending and not accept(values[0] if values else None):
+                rejected = True
+            if full:
+                while values and values[-1] is None:
+                    values.pop()
+            # rows without any value (e.g. left by deleted rows) are skipped
+            if not rejected and values != empty:
+                yield number, tuple(values)
+            # drop the parsed rows so memory stays flat
+            if sheet_data is not None:
+                sheet_data.clear()
+            else:
+                element.clear()
+
+
+def sheet_names(filename):
+    with KlocworkWorkbook(filename) as wb:
+        return wb.sheetnames
+
+
+def iter_rows(filename, sheet=None, accept=None):
+    """Yield the report rows of one sheet of `filename` as 8-tuples."""
+    with KlocworkWorkbook(filename) as wb:
+        for row in wb.iter_rows(sheet, accept=accept):
+            yield row
@@ -0,0 +1,35 @@
+from openpyxl import Workbook, load_workbook
+
+from kwparser.issues import IssueTable
+from kwparser.pipeline import sort_issues
+from kwparser.pivot import SEVERITIES
+from kwparser.xlsxreader import KlocworkWorkbook
+
+
+def test_sort_mixed_types():
+    table = IssueTable.from_rows([
+        ('b.c', 'Error', 'ABV', 'f', 'm', 'New', 'Analyze', 'u'),
+        (12, 3, 7, 'f', 'm', 'New', 'Analyze', 'u'),
+        ('a.c', None, None, 'f', 'm', 'New', 'Analyze', 'u'),
+        ('a.c', 'Critical', 'NPD', 'f', 'm', 'New', 'Analyze', 'u'),
+    ])
+    ranks = table.sort_ranks('severity', SEVERITIES)
+    assert ranks.tolist() == [1, 2, 3, 0]
+    assert [row[0] for row in sort_issues(table).rows()] == ['a.c', 'b.c', 12, 'a.c']
+
+
+def test_from_sheets_copies_every_column(tmp_path):
+    wb = Workbook()
+    wb.active.title = 'awsdm'
+    wb.active.append(('/src/a.c', 'Critical', 'NPD', 'f', 'm', 'New', 'Analyze', 'u', 'me'))
+    wb.active.append(('/src/b.c', 'Error'))
+    source, copy = str(tmp_path / "source.xlsx"), str(tmp_path / "copy.xlsx")
+    wb.save(source)
+    copy_to = Workbook(write_only=True)
+    with KlocworkWorkbook(source) as workbook:
+        table = IssueTable.from_sheets(workbook, ['awsdm'], copy_to=copy_to)
+    copy_to.save(copy)
+    assert list(table.rows()) == [
+        ('/src/a.c', 'Critical', 'NPD', 'f', 'm', 'New', 'Analyze', 'u'),
+        ('/src/b.c', 'Error', None, None, None, None, None, None)]
+    assert list(load_workbook(copy)['awsdm'].values)[0][8] == 'me'
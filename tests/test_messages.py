@@ -0,0 +1,25 @@
+from kwparser.messages import mask_lines, message_template
+
+
+def test_message_template():
+    assert message_template("Pointer 'p' returned from call to function 'f' at line 2267 may be "
+                            "NULL and will be dereferenced at line 2270.") == (
+        "Pointer '*' returned from call to function '*' at line # may be NULL and will be "
+        "dereferenced at line #.")
+    assert message_template("Array 'buf' of size 16 may use index value(s) 0..300") == (
+        "Array '*' of size # may use index value(s) #")
+    assert message_template("lines 12, 14 and 15") == "lines #"
+    assert message_template("index -1 is out of bounds, 2.5 and 0x1F") == (
+        "index -# is out of bounds, # and #")
+
+
+def test_message_template_keeps_words():
+    assert message_template("a and d, n") == "a and d, n"
+    assert message_template("cast of uint32_t to int8 at line 3") == (
+        "cast of uint32_t to int8 at line #")
+    assert message_template("1 and a 2") == "# and a #"
+
+
+def test_mask_lines():
+    assert mask_lines("at line 2267 and lines 12 and 14") == "at line # and lines #"
+    assert mask_lines(None) is None
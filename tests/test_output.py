@@ -0,0 +1,15 @@
+from openpyxl import Workbook
+
+from kwparser.output import add_summary_table, table_name
+
+
+def test_table_names():
+    wb = Workbook(write_only=True)
+    names = []
+    for name in ["oem-gui_checkers", "oem gui_checkers", "1st_dirs", "A1", "Summary", "summary"]:
+        worksheet = wb.create_sheet()
+        add_summary_table(worksheet, "A1:B2", ["a", "b"], name=name)
+        names.extend(worksheet.tables)
+    assert names == ["oem_gui_checkers", "oem_gui_checkers_2", "_1st_dirs", "_A1", "Summary",
+                     "summary_2"]
+    assert table_name(wb, "R1C1") == "_R1C1"
@@ -0,0 +1,118 @@
+from openpyxl import Workbook
+
+from kwparser.issues import IssueTable
+from kwparser.prefilter import PreFilter
+from kwparser.validate import SPILL_WIDTH, Validator, is_path
+
+ROOT = "/ws/poky/build/tmp-glibc/work/"
+AWSDM = ROOT + "armv7a-vfp-neon-oe-linux-gnueabi/awsdm/1.0-r0/fulcrum/awsdm/main.c"
+NATIVE = ROOT + "x86_64-linux/sqlite3-native/3.8-r0/sqlite/sqlite3.c"
+
+
+def row(*cells):
+    return tuple(cells) + (None,) * (SPILL_WIDTH - len(cells))
+
+
+def issue(path=AWSDM, message="Pointer 'p' may be NULL", severity='Critical'):
+    return row(path, severity, 'NPD.CHECK', 'main', message, 'New', 'Analyze', 'unowned')
+
+
+def validate(rows, accept=None, validator=None):
+    validator = validator or Validator()
+    return list(validator(rows, accept)), validator
+
+
+def test_well_formed_rows_pass_whatever_their_values():
+    rows, validator = validate([issue(severity='Style'), issue(path='main.c')])
+    assert rows == [issue(severity='Style')[:8], issue(path='main.c')[:8]]
+    assert validator.unknown == {('severity', 'Style'): 1}
+    assert not validator.quarantined
+
+
+def test_shifted_row():
+    rows, validator = validate([row(AWSDM, 'Error', 'ABV', 'f', "x = a[i]", " i++",
+                                    'New', 'Analyze', 'unowned')])
+    assert rows == [(AWSDM, 'Error', 'ABV', 'f', "x = a[i];  i++", 'New', 'Analyze', 'unowned')]
+    assert validator.repaired == {'shifted row': 1}
+
+
+def test_shifted_row_without_owner():
+    rows, validator = validate([row(AWSDM, 'Error', 'ABV', 'f', "x = a[i]", " i++",
+                                    'New', 'Analyze')])
+    assert rows == [(AWSDM, 'Error', 'ABV', 'f', "x = a[i];  i++", 'New', 'Analyze', None)]
+    assert validator.repaired == {'shifted row': 1}
+
+
+def test_split_row():
+    rows, validator = validate([row(AWSDM, 'Error', 'ABV', 'f', "if (a)"),
+                                row("b/c;", 'New', 'Analyze', 'unowned'),
+                                issue()])
+    assert rows == [(AWSDM, 'Error', 'ABV', 'f', "if (a)\nb/c;", 'New', 'Analyze', 'unowned'),
+                    issue()[:8]]
+    assert validator.repaired == {'split row': 1}
+    assert not validator.quarantined
+
+
+def test_row_split_over_several_lines():
+    rows, validator = validate([row(AWSDM, 'Error', 'ABV', 'f', "{"),
+                                row("/* empty */"),
+                                row("}", 'Existing', 'Fix', 'me')])
+    assert rows == [(AWSDM, 'Error', 'ABV', 'f', "{\n/* empty */\n}", 'Existing', 'Fix', 'me')]
+
+
+def test_bogus_continuation():
+    # the next issue is not a continuation: the split row is quarantined
+    # and the issue kept
+    rows, validator = validate([row(AWSDM, 'Error', 'ABV', 'f', "if (a)"),
+                                row(AWSDM, 'Error', 'ABV', 'g', "while (b)"),
+                                row("c", "d", "e"),
+                                issue(path='main.c')])
+    assert rows == [issue(path='main.c')[:8]]
+    assert [cells[0] for cells in validator.quarantined] == [
+        "no state after the message", "no state after the message",
+        "no state, nor a file path to start an issue"]
+
+
+def test_row_without_state_nor_path():
+    rows, validator = validate([row("x = y;", "z"), issue()])
+    assert rows == [issue()[:8]]
+    assert validator.quarantined == [
+        ["no state, nor a file path to start an issue", "x = y;", "z"]]
+
+
+def test_is_path():
+    assert is_path(AWSDM)
+    assert is_path("C:\\src\\main.c")
+    assert is_path("poky/build/tmp-glibc/work/x/y.c")
+    assert not is_path("b/c;")
+    assert not is_path("a / b")
+    assert not is_path("/* comment */")
+    assert not is_path("//comment")
+    assert not is_path("main.c")
+    assert not is_path(None)
+
+
+def test_prefilter_judges_stitched_rows():
+    prefilter = PreFilter(include=[{'recipe': 'awsdm'}], exclude=[{'arch': 'x86_64-linux'}])
+    rows, validator = validate([row(AWSDM, 'Error', 'ABV', 'f', "if (a)"),
+                                row("b;", 'New', 'Analyze', 'unowned'),
+                                row(NATIVE, 'Error', 'ABV', 'f', "if (a)"),
+                                row("b;", 'New', 'Analyze', 'unowned')], prefilter)
+    assert rows == [(AWSDM, 'Error', 'ABV', 'f', "if (a)\nb;", 'New', 'Analyze', 'unowned')]
+    assert not validator.quarantined
+    assert sum(prefilter.dropped.values()) == 1
+
+
+def test_from_workbook_prefilter(tmp_path):
+    wb = Workbook()
+    for cells in [(NATIVE, 'Error', 'ABV', 'f', "if (a)"), ("b;", 'New', 'Analyze', 'unowned'),
+                  (AWSDM, 'Error', 'ABV', 'f', "if (a)"), ("b;", 'New', 'Analyze', 'unowned')]:
+        wb.active.append(cells)
+    filename = str(tmp_path / "export.xlsx")
+    wb.save(filename)
+    validator = Validator()
+    table = IssueTable.from_workbook(filename, accept=PreFilter(exclude=[{'recipe': '*-native'}]),
+                                     validator=validator)
+    assert list(table.rows()) == [(AWSDM, 'Error', 'ABV', 'f', "if (a)\nb;", 'New', 'Analyze',
+                                   'unowned')]
+    assert not validator.quarantined
@@ -0,0 +1,66 @@
+import openpyxl
+from openpyxl import Workbook
+
+from kwparser.sheetxml import splice_sheets, write_rows
+from kwparser.xlsxreader import KlocworkWorkbook
+
+
+def test_full_width_rows(tmp_path):
+    wb = Workbook()
+    wb.active.append(('/src/a.c', 'Critical', 'NPD', 'f', 'm', 'New', 'Analyze', 'u', 'me', None,
+                      'K'))
+    wb.active.append(('/src/b.c', 'Error'))
+    wb.active.column_dimensions['A'].width = 80
+    filename = str(tmp_path / "export.xlsx")
+    wb.save(filename)
+    with KlocworkWorkbook(filename) as export:
+        assert list(export.iter_rows()) == [
+            ('/src/a.c', 'Critical', 'NPD', 'f', 'm', 'New', 'Analyze', 'u'),
+            ('/src/b.c', 'Error', None, None, None, None, None, None)]
+        assert list(export.iter_rows(width=None)) == [
+            ('/src/a.c', 'Critical', 'NPD', 'f', 'm', 'New', 'Analyze', 'u', 'me', None, 'K'),
+            ('/src/b.c', 'Error')]
+        assert export.column_widths() == {0: 80.0}
+
+
+def test_chunks(tmp_path):
+    wb = Workbook()
+    rows = [('/src/%d.c' % i, 'Error', i, ' x < 1 ', True) for i in range(1, 200)]
+    for row in rows:
+        wb.active.append(row)
+    wb.active.append(())
+    wb.active.append(('/src/last.c',))
+    wb.create_sheet('empty')
+    filename = str(tmp_path / "export.xlsx")
+    wb.save(filename)
+    with KlocworkWorkbook(filename) as export:
+        expected = list(export.iter_rows(width=None))
+        for size in (1, 500, 1 << 20):
+            chunks = export.chunks(size=size)
+            assert (len(chunks) > 1) == (size < 1 << 20)
+            assert [row for chunk in chunks
+                    for number, row in export.iter_chunk(chunk, width=None)] == expected
+        assert [number for chunk in chunks for number, row in export.iter_chunk(chunk)][-2:] == [
+            199, 201]
+        assert [list(export.iter_chunk(chunk)) for chunk in export.chunks('empty')] == [[]]
+
+
+def test_splice_sheets(tmp_path):
+    wb = Workbook()
+    rows = [('/src/a.c', 'Error', 3, ' x < 1 ', True), ('/src/b.c', None, 2.5, 'y', False)]
+    for row in rows:
+        wb.active.append(row)
+    filename = str(tmp_path / "export.xlsx")
+    wb.save(filename)
+    with KlocworkWorkbook(filename) as export:
+        fragments = []
+        for chunk in export.chunks(size=1):
+            fragments.append(str(tmp_path / ("%d.xml" % len(fragments))))
+            with open(fragments[-1], 'w', encoding='utf-8') as f:
+                for row in write_rows(f, export.iter_chunk(chunk, width=None)):
+                    pass
+    copy = Workbook(write_only=True)
+    copy.create_sheet('copy')
+    copy.save(filename)
+    splice_sheets(filename, {'copy': fragments})
+    assert list(openpyxl.load_workbook(filename)['copy'].values) == rows